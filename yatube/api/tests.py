@@ -0,0 +1,143 @@
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_STRICT=True, PAGINATOR_REC=10)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(13):
+            Post.objects.create(text=f'Пост {i}', author=cls.author,
+                                group=cls.group)
+        cls.post = Post.objects.create(text='Последний', author=cls.reader)
+        Comment.objects.create(post=cls.post, author=cls.author,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_index_cursor_pagination(self):
+        """Проверить: лента отдаётся страницами по курсору."""
+        response = self.guest_client.get(reverse('api:index'))
+        data = response.json()
+        self.assertEqual(len(data['results']), 10)
+        self.assertEqual(data['results'][0], {
+            'id': self.post.pk,
+            'text': 'Последний',
+            'pub_date': data['results'][0]['pub_date'],
+            'image': None,
+            'comments_count': 1,
+            'author': 'reader',
+            'group': None,
+        })
+        self.assertIsNone(data['previous'])
+        data = self.guest_client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 4)
+        self.assertIsNone(data['next'])
+        self.assertIsNotNone(data['previous'])
+
+    def test_group_and_profile(self):
+        """Проверить: ленты группы и автора содержат только их посты."""
+        urls = {
+            reverse('api:group_posts', args=(self.group.slug,)): 'group',
+            reverse('api:profile', args=(self.author.username,)): 'author',
+        }
+        for url, field in urls.items():
+            with self.subTest(url=url):
+                results = self.guest_client.get(url).json()['results']
+                self.assertEqual(len(results), 10)
+                self.assertEqual(
+                    {row[field] for row in results},
+                    {self.group.slug if field == 'group' else 'author'})
+
+    def test_not_found(self):
+        """Проверить: несуществующие объекты - JSON 404."""
+        urls = (
+            reverse('api:group_posts', args=('missing',)),
+            reverse('api:profile', args=('missing',)),
+            reverse('api:post_detail', args=(0,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('detail', response.json())
+
+    def test_follow_index(self):
+        """Проверить: лента подписок доступна только авторизованным."""
+        url = reverse('api:follow_index')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        results = self.authorized_client.get(url).json()['results']
+        self.assertEqual({row['author'] for row in results}, {'author'})
+
+    def test_post_detail_with_comments(self):
+        """Проверить: пост отдаётся вместе с комментариями."""
+        data = self.guest_client.get(
+            reverse('api:post_detail', args=(self.post.pk,))).json()
+        self.assertEqual(data['text'], 'Последний')
+        self.assertEqual(
+            [(c['author'], c['text']) for c in data['comments']],
+            [('author', 'Комментарий')])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.staff = User.objects.create_user(username='staff',
+                                             is_staff=True)
+        cls.post = Post.objects.create(text='Пост, "с кавычками"',
+                                       author=cls.author)
+        Post.objects.create(text='Чужой пост', author=cls.other)
+        Comment.objects.create(post=cls.post, author=cls.author,
+                               text='Свой комментарий')
+        cls.url = reverse('api:export', args=('author',))
+
+    def get(self, user, **params):
+        client = Client()
+        client.force_login(user)
+        return client.get(self.url, params)
+
+    def test_ndjson(self):
+        """Проверить: NDJSON выгружается потоком, по строке на запись."""
+        response = self.get(self.author)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row['type'], row['text']) for row in rows], [
+            ('post', 'Пост, "с кавычками"'),
+            ('comment', 'Свой комментарий'),
+        ])
+
+    def test_csv(self):
+        """Проверить: CSV содержит заголовок и экранированный текст."""
+        response = self.get(self.staff, format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['text'], 'Пост, "с кавычками"')
+
+    def test_permissions(self):
+        """Проверить: выгрузка доступна только автору и персоналу."""
+        self.assertEqual(Client().get(self.url).status_code, 401)
+        self.assertEqual(self.get(self.other).status_code, 403)
+        self.assertEqual(self.get(self.author, format='xml').status_code,
+                         400)
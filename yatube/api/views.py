@@ -0,0 +1,161 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+
+from core.query_budget import query_budget
+from posts.export import FORMATS, export
+from posts.models import Comment, Group, Post
+from posts.storage import content_storage
+from posts.timeline import TimelinePaginator
+from posts.utils import CursorPaginator, page_query_string
+
+User = get_user_model()
+
+POST_FIELDS = ('id', 'text', 'pub_date', 'image', 'comments_count',
+               'author__username', 'group__slug')
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    """CursorPaginator для строк values(): курсор берётся из словаря."""
+
+    @staticmethod
+    def encode_cursor(row):
+        return CursorPaginator.encode_raw(
+            f"{row['pub_date'].isoformat()}|{row['id']}")
+
+
+class ValuesTimelinePaginator(ValuesCursorPaginator, TimelinePaginator):
+    """Лента подписок строками того же вида, что и post_values()."""
+
+    def _seek(self, position, newer):
+        return [{
+            'id': post.pk,
+            'text': post.text,
+            'pub_date': post.pub_date,
+            'image': post.image.name,
+            'comments_count': post.comments_count,
+            'author__username': post.author.username,
+            'group__slug': post.group.slug if post.group_id else None,
+        } for post in super()._seek(position, newer)]
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def not_found():
+    return json_response({'detail': 'Не найдено.'}, status=404)
+
+
+def post_values(queryset):
+    """Только нужные колонки постов, без создания моделей."""
+    return queryset.values(*POST_FIELDS)
+
+
+def post_row(row):
+    row['author'] = row.pop('author__username')
+    row['group'] = row.pop('group__slug')
+    row['image'] = content_storage.url(row['image']) if row['image'] else None
+    return row
+
+
+def comment_row(row):
+    row['author'] = row.pop('author__username')
+    return row
+
+
+def page_response(request, queryset):
+    return paginator_response(request, ValuesCursorPaginator(
+        post_values(queryset), settings.PAGINATOR_REC))
+
+
+def paginator_response(request, paginator):
+    page = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    query = f'?{page_query_string(request)}'
+    return json_response({
+        'results': [post_row(row) for row in page],
+        'next': (request.build_absolute_uri(
+            f'{query}after={paginator.next_cursor}')
+            if paginator.next_cursor else None),
+        'previous': (request.build_absolute_uri(
+            f'{query}before={paginator.previous_cursor}')
+            if paginator.previous_cursor else None),
+    })
+
+
+@query_budget(1)
+def index(request):
+    return page_response(request, Post.objects.all())
+
+
+@query_budget(2)
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True).first()
+    if group_id is None:
+        return not_found()
+    return page_response(request, Post.objects.filter(group_id=group_id))
+
+
+@query_budget(2)
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True).first()
+    if author_id is None:
+        return not_found()
+    return page_response(request, Post.objects.filter(author_id=author_id))
+
+
+@query_budget(4)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return json_response(
+            {'detail': 'Требуется авторизация.'}, status=401)
+    return paginator_response(request, ValuesTimelinePaginator(
+        request.user, settings.PAGINATOR_REC))
+
+
+@query_budget(2)
+def post_detail(request, post_id):
+    post = post_values(Post.objects.filter(pk=post_id)).first()
+    if post is None:
+        return not_found()
+    post = post_row(post)
+    post['comments'] = [
+        comment_row(row) for row in
+        Comment.objects.filter(post_id=post_id).order_by('created', 'id')
+        .values(*COMMENT_FIELDS)
+    ]
+    return json_response(post)
+
+
+def export_posts(request, username):
+    """Потоковая выгрузка постов и комментариев автора.
+
+    Доступна самому автору и персоналу; формат - ?format=ndjson|csv.
+    """
+    if not request.user.is_authenticated:
+        return json_response(
+            {'detail': 'Требуется авторизация.'}, status=401)
+    if request.user.username != username and not request.user.is_staff:
+        return json_response({'detail': 'Доступ запрещён.'}, status=403)
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return not_found()
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in FORMATS:
+        return json_response(
+            {'detail': f'Формат должен быть одним из: {", ".join(FORMATS)}.'},
+            status=400)
+    response = StreamingHttpResponse(
+        export(author, export_format), content_type=FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{username}.{export_format}"')
+    return response
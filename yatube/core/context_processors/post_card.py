@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def post_card_cache_period(request):
+    return {
+        'post_card_cache_period': settings.POST_CARD_CACHE_PERIOD
+    }
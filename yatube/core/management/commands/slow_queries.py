@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.slow_queries import read, top
+
+
+class Command(BaseCommand):
+    help = 'Самые медленные запросы из журнала SLOW_QUERY_LOG'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG)
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            groups = top(read(options['log']), options['top'])
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {options["log"]} не найден')
+        for number, group in enumerate(groups, 1):
+            self.stdout.write(self.style.WARNING(
+                f'{number}. {group["fingerprint"]}: {group["count"]} раз, '
+                f'всего {group["total_ms"]:.1f} мс, '
+                f'максимум {group["max_ms"]:.1f} мс'))
+            self.stdout.write(f'   view: {", ".join(sorted(group["views"]))}')
+            self.stdout.write(f'   {group["sql"]}')
+            for line in (group['plan'] or '').splitlines():
+                self.stdout.write(f'   | {line}')
@@ -0,0 +1,289 @@
+import fcntl
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .query_budget import QueryCounter
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+METRICS = {
+    'yatube_requests_total': ('counter', 'Число запросов'),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа view'),
+    'yatube_db_queries_total': ('counter', 'Число SQL-запросов'),
+    'yatube_cache_requests_total': (
+        'counter', 'Обращения к кешу по видам и результату'),
+    'yatube_thumbnails_generated_total': (
+        'counter', 'Число миниатюр, обработанных генератором'),
+}
+
+MERGED = 'merged.db'
+
+_lock = threading.Lock()
+_store = None
+
+
+class MmapedDict:
+    """Словарь строка -> float в файле, отображённом в память.
+
+    Формат: 4 байта - занятый размер, затем записи: 4 байта длины ключа,
+    ключ, выравнивание до 8 байт и значение double. Файл пишет один
+    процесс; остальные только читают, поэтому новая запись сначала
+    пишется целиком и лишь затем учитывается в занятом размере.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a+b')
+        size = os.fstat(self.file.fileno()).st_size
+        if size == 0:
+            self.file.truncate(self.INITIAL_SIZE)
+            size = self.INITIAL_SIZE
+        self.capacity = size
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.used = struct.unpack_from('i', self.map, 0)[0] or 8
+        self.positions = {
+            key: position for key, _, position in entries(self.map)}
+
+    def inc(self, key, amount):
+        position = self.positions.get(key)
+        if position is None:
+            position = self.add(key)
+        value = struct.unpack_from('d', self.map, position)[0]
+        struct.pack_into('d', self.map, position, value + amount)
+
+    def add(self, key):
+        encoded = key.encode()
+        padding = -(4 + len(encoded)) % 8
+        entry = struct.pack(f'i{len(encoded)}s{padding}xd',
+                            len(encoded), encoded, 0.0)
+        while self.used + len(entry) > self.capacity:
+            self.capacity *= 2
+            self.file.truncate(self.capacity)
+            self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        self.map[self.used:self.used + len(entry)] = entry
+        position = self.used + len(entry) - 8
+        self.used += len(entry)
+        struct.pack_into('i', self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def entries(data):
+    """Записи (ключ, значение, смещение значения) файла метрик."""
+    used = struct.unpack_from('i', data, 0)[0]
+    position = 8
+    while position < used:
+        length = struct.unpack_from('i', data, position)[0]
+        position += 4
+        key = bytes(data[position:position + length]).decode()
+        position += length + -(4 + length) % 8
+        yield key, struct.unpack_from('d', data, position)[0], position
+        position += 8
+
+
+def store():
+    """Файл метрик текущего процесса; после fork создаётся новый."""
+    global _store
+    path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.db')
+    if _store is None or _store.path != path:
+        if _store is not None:
+            _store.close()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        _store = MmapedDict(path)
+    return _store
+
+
+def inc(name, labels=None, amount=1):
+    key = json.dumps([name, sorted((labels or {}).items())],
+                     ensure_ascii=False)
+    with _lock:
+        store().inc(key, amount)
+
+
+def observe(name, seconds, labels):
+    """Добавить наблюдение в гистограмму name."""
+    bucket = next((str(edge) for edge in BUCKETS if seconds <= edge), None)
+    if bucket is not None:
+        inc(f'{name}_bucket', {**labels, 'le': bucket})
+    inc(f'{name}_sum', labels, seconds)
+    inc(f'{name}_count', labels)
+
+
+def read(path):
+    with open(path, 'rb') as source:
+        data = source.read()
+    return entries(data) if len(data) >= 8 else ()
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def directory_lock():
+    """Блокировка METRICS_DIR на время слияния и чтения файлов."""
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(os.path.join(settings.METRICS_DIR, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def mark_process_dead(pid):
+    """Перенести значения завершившегося процесса в merged.db.
+
+    Счётчики не теряются, а файлы процессов не копятся. Вызывается
+    из collect и может вызываться из хука сервера при выходе воркера.
+    """
+    path = os.path.join(settings.METRICS_DIR, f'{pid}.db')
+    if not os.path.exists(path):
+        return
+    merged = MmapedDict(os.path.join(settings.METRICS_DIR, MERGED))
+    try:
+        for key, value, _ in read(path):
+            merged.inc(key, value)
+    finally:
+        merged.close()
+    os.remove(path)
+
+
+def collect():
+    """Сумма значений по файлам всех процессов.
+
+    Файлы завершившихся процессов сначала сливаются в merged.db.
+    """
+    totals = defaultdict(float)
+    with directory_lock():
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+            pid = os.path.basename(path)[:-len('.db')]
+            if pid.isdigit() and not is_alive(int(pid)):
+                mark_process_dead(int(pid))
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+            for key, value, _ in read(path):
+                totals[key] += value
+    return totals
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels)
+    return f'{{{pairs}}}'
+
+
+def render_histogram(name, samples):
+    """Строки гистограммы: накопленные корзины, _count и _sum."""
+    buckets = defaultdict(dict)
+    for labels, value in samples[f'{name}_bucket']:
+        labels = dict(labels)
+        edge = labels.pop('le')
+        buckets[tuple(sorted(labels.items()))][float(edge)] = value
+    lines = []
+    for labels, count in sorted(samples[f'{name}_count']):
+        cumulative = 0
+        for edge in BUCKETS:
+            cumulative += buckets[labels].get(float(edge), 0)
+            lines.append(f'{name}_bucket'
+                         f'{format_labels(labels + (("le", edge),))} '
+                         f'{cumulative!r}')
+        lines.append(f'{name}_bucket'
+                     f'{format_labels(labels + (("le", "+Inf"),))} '
+                     f'{count!r}')
+        lines.append(f'{name}_count{format_labels(labels)} {count!r}')
+    for labels, value in sorted(samples[f'{name}_sum']):
+        lines.append(f'{name}_sum{format_labels(labels)} {value!r}')
+    return lines
+
+
+def render_cache_ratios(samples):
+    """Производная метрика: доля попаданий в кеш по видам ключей."""
+    hits = defaultdict(lambda: [0, 0])
+    for labels, value in samples['yatube_cache_requests_total']:
+        labels = dict(labels)
+        hits[labels['kind']][labels['result'] == 'hit'] += value
+    lines = [
+        '# HELP yatube_cache_hit_ratio Доля попаданий в кеш',
+        '# TYPE yatube_cache_hit_ratio gauge',
+    ]
+    for kind, (misses, hit_count) in sorted(hits.items()):
+        lines.append(f'yatube_cache_hit_ratio{{kind="{kind}"}} '
+                     f'{hit_count / (hit_count + misses)!r}')
+    return lines
+
+
+def render(totals):
+    """Текстовый формат Prometheus."""
+    samples = defaultdict(list)
+    for key, value in totals.items():
+        name, labels = json.loads(key)
+        samples[name].append((tuple(map(tuple, labels)), value))
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            lines.extend(render_histogram(name, samples))
+        else:
+            lines.extend(f'{name}{format_labels(labels)} {value!r}'
+                         for labels, value in sorted(samples[name]))
+    lines.extend(render_cache_ratios(samples))
+    return '\n'.join(lines) + '\n'
+
+
+def export(request):
+    """Метрики всех процессов; доступны только с METRICS_ALLOWED_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()),
+                        content_type='text/plain; version=0.0.4')
+
+
+class MetricsMiddleware:
+    """Число запросов, время ответа и SQL-запросы по имени view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        inc('yatube_requests_total', {
+            'view': view, 'method': request.method,
+            'status': str(response.status_code),
+        })
+        observe('yatube_request_duration_seconds', elapsed, {'view': view})
+        inc('yatube_db_queries_total', {'view': view}, counter.count)
+        return response
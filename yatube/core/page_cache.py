@@ -0,0 +1,58 @@
+import hashlib
+import re
+from functools import wraps
+from urllib.parse import parse_qsl
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+HOLE_RE = re.compile(r'<!--hole:([\w/.-]+)(?:\?([^>]*))?-->')
+
+
+def audience(request):
+    if request.user.is_authenticated:
+        return 'authenticated'
+    return 'anonymous'
+
+
+def fill_holes(content, request):
+    """Отрисовать персональные фрагменты на месте меток {% hole %}."""
+    def render_hole(match):
+        context = dict(parse_qsl(match.group(2) or ''))
+        return render_to_string(match.group(1), context, request=request)
+    return HOLE_RE.sub(render_hole, content)
+
+
+def audience_cache_page(timeout, key_prefix=''):
+    """Кеш страницы, общий для всей аудитории (аноним/вошедший).
+
+    Персональные фрагменты, отмеченные тегом {% hole %}, в кеш не
+    попадают: на их месте хранится метка, которая заполняется при
+    каждом запросе. key_prefix может быть функцией без аргументов.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            prefix = key_prefix() if callable(key_prefix) else key_prefix
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f'page:{prefix}:{audience(request)}:{path}'
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content_type=content_type)
+            else:
+                request.punch_holes = True
+                response = view(request, *args, **kwargs)
+                if response.streaming:
+                    return response
+                content = response.content.decode(response.charset)
+                if response.status_code == 200:
+                    cache.set(key, (content, response['Content-Type']),
+                              timeout)
+            response.content = fill_holes(content, request)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,168 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+_missing = object()
+
+
+class Profile:
+    """Замеры одного запроса: суммарное время и число событий по видам."""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = Counter()
+        self.active = Counter()
+
+
+def current():
+    """Профиль текущего запроса или None, если запрос не в выборке."""
+    return getattr(_state, 'profile', None)
+
+
+@contextmanager
+def timer(name):
+    """Добавить время блока к замеру name текущего запроса.
+
+    Вложенные блоки с тем же именем не считаются второй раз.
+    """
+    profile = current()
+    if profile is None or profile.active[name]:
+        yield
+        return
+    profile.active[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.active[name] -= 1
+        profile.durations[name] += time.perf_counter() - started
+        profile.counts[name] += 1
+
+
+def count(name, value=1):
+    profile = current()
+    if profile is not None:
+        profile.counts[name] += value
+
+
+def cache_kind(key):
+    if key.startswith('page:'):
+        return 'page'
+    if key.startswith('template.cache.'):
+        return 'fragment'
+    return 'other'
+
+
+class ProfiledCacheMixin:
+    """Считает попадания и промахи кеша по видам ключей."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        result = 'hit' if value is not _missing else 'miss'
+        kind = cache_kind(key)
+        count(f'cache_{result}:{kind}')
+        metrics.inc('yatube_cache_requests_total',
+                    {'kind': kind, 'result': result})
+        return default if value is _missing else value
+
+
+class ProfiledLocMemCache(ProfiledCacheMixin, LocMemCache):
+    pass
+
+
+class ProfiledFileBasedCache(ProfiledCacheMixin, FileBasedCache):
+    """Файловый кеш, общий для всех процессов сервера."""
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        with timer('template'):
+            return super().render(context, request)
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """Шаблонный бэкенд Django, замеряющий время отрисовки."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return ProfiledTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def sql_timer(execute, sql, params, many, context):
+    with timer('sql'):
+        return execute(sql, params, many, context)
+
+
+def server_timing(profile, total):
+    """Значение заголовка Server-Timing."""
+    parts = [f'total;dur={total * 1000:.1f}']
+    for name in ('sql', 'template', 'thumbnails'):
+        if profile.counts[name]:
+            parts.append(
+                f'{name};dur={profile.durations[name] * 1000:.1f};'
+                f'desc="{profile.counts[name]}"')
+    hits = sum(value for name, value in profile.counts.items()
+               if name.startswith('cache_hit:'))
+    misses = sum(value for name, value in profile.counts.items()
+                 if name.startswith('cache_miss:'))
+    if hits or misses:
+        parts.append(f'cache;desc="hit={hits} miss={misses}"')
+    return ', '.join(parts)
+
+
+class ProfilingMiddleware:
+    """Замеры SQL, шаблонов, кеша и миниатюр для части запросов.
+
+    Доля запросов задаётся PROFILING_SAMPLE_RATE; остальные проходят
+    без накладных расходов. Для выбранных запросов добавляется заголовок
+    Server-Timing и пишется строка JSON в лог core.profiling.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = _state.profile = Profile()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(sql_timer):
+                response = self.get_response(request)
+        finally:
+            _state.profile = None
+        total = time.perf_counter() - started
+        response['Server-Timing'] = server_timing(profile, total)
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'durations_ms': {name: round(value * 1000, 1)
+                             for name, value in profile.durations.items()},
+            'counts': dict(profile.counts),
+        }, ensure_ascii=False))
+        return response
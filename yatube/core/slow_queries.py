@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Запрос без литералов и длины списков IN и его короткий хеш."""
+    normalized = IN_LIST_RE.sub('IN (...)', sql)
+    normalized = LITERAL_RE.sub('?', normalized)
+    normalized = SPACE_RE.sub(' ', normalized).strip()
+    return normalized, hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def explain(connection, sql, params):
+    """План запроса; выполняется мимо execute_wrapper'ов соединения."""
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(
+            f'{connection.ops.explain_query_prefix()} {sql}', params)
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+    except DatabaseError as error:
+        return f'EXPLAIN не выполнен: {error}'
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """execute_wrapper, пишущий запросы дольше SLOW_QUERY_THRESHOLD_MS.
+
+    Каждая запись - строка JSON в SLOW_QUERY_LOG: время, view, отпечаток
+    и план запроса. План SELECT снимается один раз на отпечаток в
+    процессе, чтобы EXPLAIN не удваивал нагрузку.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.explained = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is None:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= threshold:
+            self.record(sql, params, many, duration)
+        return result
+
+    def record(self, sql, params, many, duration):
+        normalized, key = fingerprint(sql)
+        plan = self.explained.get(key)
+        if (plan is None and not many
+                and sql.lstrip()[:6].upper() == 'SELECT'):
+            plan = self.explained[key] = explain(
+                self.connection, sql, params)
+        entry = {
+            'time': time.time(),
+            'duration_ms': round(duration, 3),
+            'view': getattr(_state, 'view', None),
+            'fingerprint': key,
+            'sql': normalized,
+            'plan': plan,
+        }
+        logger.warning('Медленный запрос %.1f мс (%s): %s',
+                       duration, entry['view'], normalized)
+        with open(settings.SLOW_QUERY_LOG, 'a', encoding='utf-8') as log:
+            log.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def install(sender, connection, **kwargs):
+    """Подключить журнал медленных запросов к новому соединению."""
+    if not any(isinstance(wrapper, SlowQueryLog)
+               for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryLog(connection))
+
+
+class SlowQueryMiddleware:
+    """Запоминает имя view, чтобы записи журнала ссылались на неё."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            _state.view = None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _state.view = request.resolver_match.view_name
+
+
+def read(path):
+    with open(path, encoding='utf-8') as source:
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+def top(entries, limit):
+    """Отпечатки с наибольшим суммарным временем."""
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'], 'sql': entry['sql'],
+            'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'views': set(), 'plan': None,
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        if entry['view']:
+            group['views'].add(entry['view'])
+        group['plan'] = entry['plan'] or group['plan']
+    return sorted(groups.values(), key=lambda group: -group['total_ms'])[
+        :limit]
@@ -0,0 +1,101 @@
+import gzip
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.txt', '.json')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и сжатыми копиями .gz.
+
+    Копии создаются при collectstatic. Пока collectstatic не запускался
+    (разработка, тесты), {% static %} отдаёт имена без хеша.
+    """
+
+    manifest_strict = False
+
+    @cached_property
+    def fingerprinted(self):
+        return set(self.hashed_files.values())
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed = super().post_process(paths, dry_run, **options)
+        for name, hashed_name, result in processed:
+            yield name, hashed_name, result
+            if dry_run or not hashed_name or isinstance(result, Exception):
+                continue
+            for compressed_name in (name, hashed_name):
+                if compressed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                    self.compress(compressed_name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            with open(f'{path}.gz', 'wb') as target:
+                target.write(compressed)
+
+
+def serve(request, path):
+    """Отдать файл из STATIC_ROOT с долгим кешем для имён с хешем.
+
+    Если клиент принимает gzip и рядом лежит копия .gz, отдаётся она.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    encoding = None
+    if ('gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+            and os.path.isfile(f'{full_path}.gz')):
+        full_path, encoding = f'{full_path}.gz', 'gzip'
+
+    stat = os.stat(full_path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(full_path, 'rb'),
+            content_type=content_type or 'application/octet-stream')
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Content-Length'] = stat.st_size
+        if encoding:
+            response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if is_fingerprinted(path):
+        patch_cache_control(response, public=True, immutable=True,
+                            max_age=IMMUTABLE_MAX_AGE)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def is_fingerprinted(path):
+    return path in getattr(staticfiles_storage, 'fingerprinted', ())
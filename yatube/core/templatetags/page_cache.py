@@ -0,0 +1,22 @@
+from urllib.parse import urlencode
+
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **params):
+    """Персональный фрагмент страницы из кеша audience_cache_page.
+
+    Вне такого кеша шаблон отрисовывается сразу; параметры передаются
+    в него строками.
+    """
+    request = context.get('request')
+    if getattr(request, 'punch_holes', False):
+        query = f'?{urlencode(params)}' if params else ''
+        return mark_safe(f'<!--hole:{template_name}{query}-->')
+    params = {key: str(value) for key, value in params.items()}
+    return render_to_string(template_name, params, request=request)
@@ -0,0 +1,25 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Тесты пишут общий файловый кеш и метрики во временный каталог."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.temp_dir = tempfile.mkdtemp()
+        self.overrides = override_settings(CACHES={'default': {
+            **settings.CACHES['default'],
+            'LOCATION': os.path.join(self.temp_dir, 'cache'),
+        }}, METRICS_DIR=os.path.join(self.temp_dir, 'metrics'))
+        self.overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.overrides.disable()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -1,28 +1,67 @@
 from django.contrib import admin
 
 from .models import Comment, Follow, Group, Post
+from .search import fts_available, search_ids, to_match_query
+from .utils import ApproximateCountPaginator
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs)
+        if db_field.name == 'group' and request is not None:
+            # Список групп строится один раз на запрос, а не в каждой строке.
+            if not hasattr(request, '_group_choices'):
+                request._group_choices = list(formfield.choices)
+            formfield.choices = request._group_choices
+        return formfield
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту через индекс FTS5 вместо LIKE '%...%'.
+        if not search_term or not fts_available():
+            return super().get_search_results(
+                request, queryset, search_term)
+        if not to_match_query(search_term):
+            # Одни знаки препинания: пустой MATCH - ошибка SQLite.
+            return queryset.none(), False
+        return queryset.filter(pk__in=search_ids(search_term)), False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'posts_count',)
+    search_fields = ('title', 'slug',)
 
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'created', 'author', 'post',)
     list_editable = ('post',)
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('post', 'author',)
     search_fields = ('text',)
     list_filter = ('created',)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author',)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,159 @@
+import json
+import math
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from .dataset import generate_records, make_images
+from .importer import Checkpoint, Importer
+from .models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+DATASETS = {
+    'small': {'users': 50, 'groups': 5, 'posts': 500,
+              'comments': 1000, 'follows': 5},
+    'medium': {'users': 1000, 'groups': 20, 'posts': 20000,
+               'comments': 40000, 'follows': 20},
+    'large': {'users': 10000, 'groups': 50, 'posts': 200000,
+              'comments': 400000, 'follows': 30},
+}
+
+
+def load(spec, seed=0, images=5, image_ratio=0.2):
+    """Загрузить синтетический набор spec в текущую базу."""
+    image_names = make_images(random.Random(seed), images)
+    records = generate_records(
+        seed, spec['users'], spec['groups'], spec['posts'],
+        spec['comments'], spec['follows'],
+        image_names=image_names, image_ratio=image_ratio,
+    )
+    importer = Importer(Checkpoint(None), 5000, f'generate_dataset:{seed}')
+    for _ in importer.run(records):
+        pass
+
+
+def scenarios():
+    """Сценарии замера на загруженном наборе.
+
+    Имя сценария -> (пользователь, метод, URL, данные); страницы берутся
+    для самых популярных автора, группы и поста набора.
+    """
+    author = AuthorStats.objects.order_by('-posts_count').first().user
+    reader = AuthorStats.objects.order_by('-following_count').first().user
+    group = Group.objects.order_by('-posts_count').first()
+    post = Post.objects.order_by('-comments_count').first()
+    return {
+        'index': (None, 'get', reverse('posts:index'), None),
+        'group_posts': (None, 'get', reverse(
+            'posts:group_list', kwargs={'slug': group.slug}), None),
+        'profile': (None, 'get', reverse(
+            'posts:profile', kwargs={'username': author.username}), None),
+        'post_detail': (None, 'get', reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}), None),
+        'follow_index': (reader, 'get', reverse('posts:follow_index'), None),
+        'post_create': (author, 'post', reverse('posts:post_create'),
+                        {'text': 'Пост для замера'}),
+    }
+
+
+class QueryTimer:
+    """execute_wrapper, считающий SQL-запросы и их суммарное время."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def percentile(values, share):
+    """Перцентиль методом ближайшего ранга."""
+    values = sorted(values)
+    return values[max(math.ceil(share * len(values)) - 1, 0)]
+
+
+def measure(user, method, url, data, iterations, warmup=2):
+    """Время ответа и SQL одного сценария.
+
+    Кэш страниц сбрасывается перед каждым запросом, чтобы замерять саму
+    view, а не попадание в кэш.
+    """
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    latencies, sql_times, query_counts = [], [], []
+    for iteration in range(warmup + iterations):
+        cache.clear()
+        queries = QueryTimer()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise AssertionError(f'{url}: ответ {response.status_code}')
+        if iteration < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        sql_times.append(queries.seconds * 1000)
+        query_counts.append(queries.count)
+    return {
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'sql_ms': round(percentile(sql_times, 0.5), 2),
+        'queries': max(query_counts),
+    }
+
+
+def run(iterations):
+    """Замерить все сценарии на текущей базе."""
+    return {
+        name: measure(*scenario, iterations=iterations)
+        for name, scenario in scenarios().items()
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Регрессии относительно baseline.
+
+    Число запросов не должно расти вовсе, p95 - не больше чем в
+    1 + tolerance раз. Сценарии без базовой линии пропускаются.
+    """
+    regressions = []
+    for dataset, views in results.items():
+        for view, result in views.items():
+            base = baseline.get(dataset, {}).get(view)
+            if base is None:
+                continue
+            if result['queries'] > base['queries']:
+                regressions.append(
+                    f'{dataset}/{view}: {result["queries"]} SQL-запросов '
+                    f'вместо {base["queries"]}')
+            if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{dataset}/{view}: p95 {result["p95_ms"]} мс '
+                    f'вместо {base["p95_ms"]} мс')
+    return regressions
+
+
+def read(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def write(path, results):
+    with open(path, 'w', encoding='utf-8') as target:
+        json.dump(results, target, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        target.write('\n')
@@ -0,0 +1,100 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db.models import Max
+
+from core.page_cache import audience_cache_page
+from .models import Follow, Post
+
+FEED_VERSION_KEY = 'posts:feed_version'
+AUTHOR_VERSION_KEY = 'posts:author_version:{}'
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        # После вытеснения ключа версия не должна совпасть со старой.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    # Не incr: в общем кеше два одновременных incr дают одну версию.
+    cache.set(key, time.time_ns(), None)
+
+
+def feed_version():
+    """Текущая версия лент; входит в ключи кеша страниц и фрагментов."""
+    return _version(FEED_VERSION_KEY)
+
+
+def bump_feed_version():
+    """Сделать устаревшими все закешированные страницы лент."""
+    _bump(FEED_VERSION_KEY)
+
+
+def author_version(author_id):
+    """Время изменения профиля автора в нс; входит в валидаторы постов.
+
+    Заменяет обновление modified у всех постов автора при каждом
+    сохранении профиля.
+    """
+    return _version(AUTHOR_VERSION_KEY.format(author_id))
+
+
+def bump_author_version(author_id):
+    _bump(AUTHOR_VERSION_KEY.format(author_id))
+
+
+def versioned_cache_page(timeout):
+    """Кеш страницы лент по аудитории; ключ меняется с версией лент."""
+    return audience_cache_page(
+        timeout, key_prefix=lambda: f'feed:{feed_version()}')
+
+
+# Валидаторы условных GET-запросов (ETag / Last-Modified). Они
+# вычисляются до рендеринга и учитывают зрителя: от него зависят
+# шапка, формы и кнопка подписки.
+
+def feed_etag(request, *args, **kwargs):
+    return f'{feed_version()}-{request.user.pk or 0}'
+
+
+def profile_etag(request, username):
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(
+            user=request.user, author__username=username).exists()
+    )
+    return f'{feed_etag(request)}-{int(following)}'
+
+
+def _post_state(request, post_id):
+    """Дата изменения поста, комментарии и автор."""
+    if not hasattr(request, '_post_state'):
+        request._post_state = Post.objects.filter(pk=post_id).annotate(
+            last_comment=Max('comments__created'),
+        ).values_list('modified', 'comments_count', 'last_comment',
+                      'author_id').first()
+    return request._post_state
+
+
+def post_etag(request, post_id):
+    state = _post_state(request, post_id)
+    if state is None:
+        return None
+    modified, comments_count, _, author_id = state
+    return (f'{feed_etag(request)}-{modified.timestamp()}'
+            f'-{comments_count}-{author_version(author_id)}')
+
+
+def post_last_modified(request, post_id):
+    state = _post_state(request, post_id)
+    if state is None:
+        return None
+    modified, _, last_comment, author_id = state
+    author_changed = datetime.fromtimestamp(
+        author_version(author_id) / 10 ** 9, timezone.utc)
+    return max(filter(None, (modified, last_comment, author_changed)))
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def _change(queryset, field, delta):
+    if delta < 0:
+        # Рассинхронизированный счётчик не уводим ниже нуля.
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    if delta:
+        queryset.update(**{field: F(field) + delta})
+
+
+def change_user(user_id, field, delta):
+    """Сдвинуть счётчик пользователя; строку чинит recount_counters."""
+    if user_id is not None:
+        _change(AuthorStats.objects.filter(user_id=user_id), field, delta)
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        _change(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def change_post(post_id, delta):
+    if post_id is not None:
+        _change(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def author_stats(user):
+    """Счётчики пользователя; отсутствующая строка пересчитывается."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        recount_users(User.objects.filter(pk=user.pk))
+        return AuthorStats.objects.get(user=user)
+
+
+def _count_of(model, field, value='pk'):
+    rows = (
+        model.objects.filter(**{field: OuterRef(value)})
+        .order_by().values(field).annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def recount_users(users):
+    missing = users.filter(stats__isnull=True).values_list('pk', flat=True)
+    AuthorStats.objects.bulk_create(
+        AuthorStats(user_id=user_id) for user_id in missing
+    )
+    AuthorStats.objects.filter(user__in=users).update(
+        posts_count=_count_of(Post, 'author', 'user'),
+        followers_count=_count_of(Follow, 'author', 'user'),
+        following_count=_count_of(Follow, 'user', 'user'),
+    )
+
+
+def recount_groups(groups):
+    groups.update(posts_count=_count_of(Post, 'group'))
+
+
+def recount_posts(posts):
+    posts.update(comments_count=_count_of(Comment, 'post'))
+
+
+def recount_all():
+    """Пересчитать все счётчики по текущим строкам таблиц."""
+    recount_users(User.objects.all())
+    recount_groups(Group.objects.all())
+    recount_posts(Post.objects.all())
@@ -0,0 +1,113 @@
+import random
+from bisect import bisect
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from .storage import content_storage
+
+# Фиксированная дата вместо now(): набор не зависит от дня запуска.
+END_DATE = datetime(2022, 9, 30, tzinfo=timezone.utc)
+PARETO_ALPHA = 1.5
+
+
+class Zipf:
+    """Случайный индекс 0..n-1 с весом 1 / (индекс + 1) ** exponent."""
+
+    def __init__(self, rng, n, exponent):
+        self.rng = rng
+        self.weights = list(
+            accumulate(1 / (i + 1) ** exponent for i in range(n)))
+
+    def __call__(self):
+        index = bisect(self.weights, self.rng.random() * self.weights[-1])
+        return min(index, len(self.weights) - 1)
+
+
+def make_images(rng, count):
+    """Сохранить count разных картинок; вернуть их имена в хранилище."""
+    names = []
+    for _ in range(count):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        buffer = BytesIO()
+        Image.new('RGB', (640, 360), color).save(buffer, 'PNG')
+        names.append(content_storage.save(
+            'posts/synthetic.png', ContentFile(buffer.getvalue())))
+    return names
+
+
+def generate_records(seed, users, groups, posts, comments, follows,
+                     skew=1.1, days=365, image_names=(), image_ratio=0.0):
+    """Записи синтетического набора в формате import_content.
+
+    Всё определяется seed. Авторы постов и авторы, на которых
+    подписываются, выбираются по закону Ципфа с показателем skew,
+    поэтому немногие пользователи пишут большую часть постов и собирают
+    большую часть подписчиков. Число подписок пользователя распределено
+    по Парето со средним follows. Комментарии достаются популярным
+    постам чаще.
+    """
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+
+    for user_id in range(1, users + 1):
+        yield {
+            'type': 'user', 'id': user_id,
+            'username': f'{fake.user_name()}_{user_id}',
+            'first_name': fake.first_name(), 'last_name': fake.last_name(),
+        }
+    slugs = [f'group-{number}' for number in range(1, groups + 1)]
+    for slug in slugs:
+        yield {
+            'type': 'group', 'slug': slug,
+            'title': fake.sentence(nb_words=3)[:200],
+            'description': fake.paragraph(),
+        }
+
+    # Ранг популярности -> id пользователя.
+    by_rank = list(range(1, users + 1))
+    rng.shuffle(by_rank)
+    popular_user = Zipf(rng, users, skew)
+    pareto_scale = follows * (PARETO_ALPHA - 1) / PARETO_ALPHA
+    for user_id in range(1, users + 1):
+        count = min(users - 1,
+                    int(pareto_scale * rng.paretovariate(PARETO_ALPHA)))
+        authors = {by_rank[popular_user()] for _ in range(count)}
+        for author_id in sorted(authors - {user_id}):
+            yield {'type': 'follow', 'user': user_id, 'author': author_id}
+
+    start = END_DATE - timedelta(days=days)
+    step = timedelta(days=days) / max(posts, 1)
+    popular_group = Zipf(rng, groups, skew) if groups else None
+    for post_id in range(1, posts + 1):
+        record = {
+            'type': 'post', 'id': post_id,
+            'author': by_rank[popular_user()],
+            'text': fake.text(max_nb_chars=rng.choice((80, 200, 600))),
+            'pub_date': (start + step * post_id).isoformat(),
+        }
+        if popular_group is not None and rng.random() < 0.7:
+            record['group'] = slugs[popular_group()]
+        if image_names and rng.random() < image_ratio:
+            record['image'] = rng.choice(image_names)
+        yield record
+
+    post_by_rank = list(range(1, posts + 1))
+    rng.shuffle(post_by_rank)
+    popular_post = Zipf(rng, posts, skew) if posts else None
+    for comment_id in range(1, comments + 1 if posts else 1):
+        post_id = post_by_rank[popular_post()]
+        created = start + step * post_id + timedelta(
+            minutes=rng.randrange(60 * 24 * 7))
+        yield {
+            'type': 'comment', 'id': comment_id, 'post': post_id,
+            'author': rng.randrange(1, users + 1),
+            'text': fake.sentence(),
+            'created': created.isoformat(),
+        }
@@ -0,0 +1,69 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Post
+
+FIELDS = ('type', 'id', 'post_id', 'created', 'group', 'text', 'image',
+          'comments_count')
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_rows(user):
+    """Посты и комментарии пользователя по одной строке.
+
+    Строки читаются из БД порциями EXPORT_CHUNK_SIZE, поэтому память
+    не зависит от числа записей автора.
+    """
+    posts = Post.objects.filter(author=user).order_by('pk').values_list(
+        'pk', 'pub_date', 'group__slug', 'text', 'image', 'comments_count')
+    for pk, pub_date, group, text, image, comments_count in posts.iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'post', 'id': pk, 'post_id': pk, 'created': pub_date,
+            'group': group, 'text': text, 'image': image or None,
+            'comments_count': comments_count,
+        }
+    comments = Comment.objects.filter(author=user).order_by(
+        'pk').values_list('pk', 'post_id', 'created', 'text')
+    for pk, post_id, created, text in comments.iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'comment', 'id': pk, 'post_id': post_id,
+            'created': created, 'group': None, 'text': text, 'image': None,
+            'comments_count': None,
+        }
+
+
+def to_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+        yield '\n'
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку записи."""
+
+    def write(self, value):
+        return value
+
+
+def to_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([
+            row['created'].isoformat() if field == 'created' else row[field]
+            for field in FIELDS
+        ])
+
+
+def export(user, export_format):
+    """Выгрузка пользователя в формате ndjson или csv: строки текста."""
+    writer = to_csv if export_format == 'csv' else to_ndjson
+    return writer(export_rows(user))
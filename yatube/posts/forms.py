@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Comment, Post
+from .uploads import ingest_image, too_large
 
 
 class PostForm(forms.ModelForm):
@@ -17,6 +19,19 @@ class PostForm(forms.ModelForm):
             ),
         }
 
+    def __init__(self, *args, oversized=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        # Поля, приём которых прервал SizeLimitUploadHandler.
+        self.oversized = oversized
+
+    def clean_image(self):
+        if 'image' in self.oversized:
+            raise too_large()
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return ingest_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
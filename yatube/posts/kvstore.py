@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class KVStore(KVStoreBase):
+    """KV-хранилище sorl-thumbnail: таблица в БД и LRU внутри процесса.
+
+    Таблица общая для всех процессов и переживает перезапуск; LRU
+    снимает повторные запросы. prefetch() загружает записи для целой
+    страницы постов одним запросом.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > settings.THUMBNAIL_LRU_SIZE:
+                self._lru.popitem(last=False)
+
+    def _forget(self, keys):
+        with self._lock:
+            for key in keys:
+                self._lru.pop(key, None)
+
+    def prefetch(self, image_keys):
+        """Загрузить записи миниатюр по их ключам одним запросом."""
+        raw_keys = [add_prefix(key) for key in image_keys]
+        with self._lock:
+            raw_keys = [key for key in raw_keys if key not in self._lru]
+        if not raw_keys:
+            return
+        rows = KVStoreModel.objects.filter(
+            key__in=raw_keys).values_list('key', 'value')
+        for key, value in rows:
+            self._remember(key, value)
+
+    def _get_raw(self, key):
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return self._lru[key]
+        value = KVStoreModel.objects.filter(key=key).values_list(
+            'value', flat=True).first()
+        # Промахи не запоминаются: миниатюру мог создать другой процесс.
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        KVStoreModel.objects.update_or_create(
+            key=key, defaults={'value': value})
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        KVStoreModel.objects.filter(key__in=keys).delete()
+        self._forget(keys)
+
+    def _find_keys_raw(self, prefix):
+        return KVStoreModel.objects.filter(
+            key__startswith=prefix).values_list('key', flat=True)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import backfill_pending
+
+
+class Command(BaseCommand):
+    help = ('Разложить по лентам подписчиков посты авторов, '
+            'переставших быть популярными')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Сколько авторов обработать за запуск',
+        )
+
+    def handle(self, *args, **options):
+        done = backfill_pending(options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Обработано авторов: {done}'))
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from posts import benchmark
+
+BENCHMARKS_DIR = os.path.join(settings.BASE_DIR, 'benchmarks')
+
+
+class Command(BaseCommand):
+    help = ('Замерить время ответа и SQL основных страниц на '
+            'синтетических наборах данных и сравнить с базовой линией')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset', action='append', choices=benchmark.DATASETS,
+            help='Набор данных; можно указать несколько раз',
+        )
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--output', default=os.path.join(BENCHMARKS_DIR, 'latest.json'),
+        )
+        parser.add_argument(
+            '--baseline',
+            default=os.path.join(BENCHMARKS_DIR, 'baseline.json'),
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help='Допустимый рост p95 относительно базовой линии',
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Записать результаты в базовую линию',
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        media_root = tempfile.mkdtemp()
+        setup_test_environment(debug=False)
+        try:
+            with override_settings(
+                MEDIA_ROOT=media_root, THUMBNAIL_WORKERS=0,
+                QUERY_BUDGET_STRICT=False,
+                CACHES={'default': {
+                    'BACKEND':
+                        'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'benchmark',
+                }},
+            ):
+                for name in options['dataset'] or ['small']:
+                    results[name] = self.run_dataset(
+                        name, options['iterations'])
+        finally:
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        benchmark.write(options['output'], results)
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
+        if options['update_baseline']:
+            baseline = (benchmark.read(options['baseline'])
+                        if os.path.exists(options['baseline']) else {})
+            baseline.update(results)
+            benchmark.write(options['baseline'], baseline)
+            self.stdout.write(self.style.SUCCESS('Базовая линия обновлена'))
+            return
+        if not os.path.exists(options['baseline']):
+            return
+        regressions = benchmark.compare(
+            results, benchmark.read(options['baseline']),
+            options['tolerance'])
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run_dataset(self, name, iterations):
+        """Замер на наборе name в отдельной тестовой базе."""
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                           serialize=False)
+        try:
+            self.stdout.write(f'Загрузка набора {name}...')
+            benchmark.load(benchmark.DATASETS[name])
+            results = benchmark.run(iterations)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        for view, result in results.items():
+            self.stdout.write(
+                f'{name}/{view}: p50 {result["p50_ms"]} мс, '
+                f'p95 {result["p95_ms"]} мс, '
+                f'{result["queries"]} SQL ({result["sql_ms"]} мс)')
+        return results
@@ -0,0 +1,59 @@
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from posts.media import find_orphans, referenced_images, thumbnail_index
+
+
+class Command(BaseCommand):
+    help = ('Удалить из MEDIA_ROOT картинки и миниатюры, на которые '
+            'не ссылаются посты. Можно запускать по расписанию (cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько файлов удалять за раз',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=60 * 60,
+            help='Не трогать файлы моложе стольких секунд',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        verb = 'Найдено' if dry_run else 'Удалено'
+        referenced = referenced_images()
+        live, stale_keys = thumbnail_index(referenced)
+        orphans = find_orphans(referenced, live, options['min_age'])
+        files = freed = 0
+        while True:
+            batch = list(islice(orphans, batch_size))
+            if not batch:
+                break
+            for path, size in batch:
+                if dry_run:
+                    self.stdout.write(path)
+                else:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        continue
+                files += 1
+                freed += size
+            self.stdout.write(f'{verb} файлов: {files}, байт: {freed}')
+
+        if not dry_run:
+            for start in range(0, len(stale_keys), batch_size):
+                KVStoreModel.objects.filter(
+                    key__in=stale_keys[start:start + batch_size]).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} файлов: {files}, байт: {freed}, '
+            f'записей миниатюр: {len(stale_keys)}'
+        ))
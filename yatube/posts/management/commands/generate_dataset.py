@@ -0,0 +1,60 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.dataset import generate_records, make_images
+from posts.importer import Checkpoint, Importer
+
+
+class Command(BaseCommand):
+    help = ('Сгенерировать воспроизводимый синтетический набор данных '
+            'для нагрузочных проверок')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows', type=float, default=20,
+            help='Среднее число подписок пользователя',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Ципфа для авторов, подписок и комментариев',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределены посты',
+        )
+        parser.add_argument(
+            '--images', type=int, default=20,
+            help='Сколько разных картинок создать',
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.2,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        image_names = make_images(random.Random(options['seed']),
+                                  options['images'])
+        records = generate_records(
+            options['seed'], options['users'], options['groups'],
+            options['posts'], options['comments'], options['follows'],
+            skew=options['skew'], days=options['days'],
+            image_names=image_names, image_ratio=options['image_ratio'],
+        )
+        importer = Importer(Checkpoint(None), options['batch_size'],
+                            f'generate_dataset:{options["seed"]}')
+        started = time.monotonic()
+        created = 0
+        for count in importer.run(records):
+            created += count
+            rate = created / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'{created} записей, {rate:.0f} записей/с')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано записей: {created}'))
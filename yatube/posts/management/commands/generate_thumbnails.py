@@ -0,0 +1,40 @@
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails, get_executor
+
+
+class Command(BaseCommand):
+    help = 'Сгенерировать миниатюры для уже загруженных картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько картинок ставить в очередь за раз',
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='').order_by()
+            .values_list('image', flat=True).distinct()
+        )
+        total = names.count()
+        iterator = names.iterator()
+        done = 0
+        while True:
+            batch = list(islice(iterator, options['batch_size']))
+            if not batch:
+                break
+            if settings.THUMBNAIL_WORKERS:
+                results = get_executor().map(
+                    generate_thumbnails, batch,
+                    chunksize=max(1, len(batch) // settings.THUMBNAIL_WORKERS),
+                )
+            else:
+                results = map(generate_thumbnails, batch)
+            done += len(list(results))
+            self.stdout.write(f'{done}/{total}')
+        self.stdout.write(self.style.SUCCESS('Миниатюры сгенерированы'))
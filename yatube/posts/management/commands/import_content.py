@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts.importer import FORMATS, Checkpoint, Importer, read_records
+
+
+class Command(BaseCommand):
+    help = ('Импортировать пользователей, группы, посты, комментарии и '
+            'подписки из выгрузки NDJSON или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат выгрузки; по умолчанию - по расширению файла',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Сколько записей импортировать в одной транзакции',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл состояния для продолжения; по умолчанию '
+                 '<path>.checkpoint',
+        )
+        parser.add_argument(
+            '--source',
+            help='Имя выгрузки для соответствия старых и новых id; по '
+                 'умолчанию - имя файла',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать импорт заново, забыв сохранённое состояние',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        record_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        checkpoint = Checkpoint(
+            options['checkpoint'] or f'{path}.checkpoint')
+        if options['restart']:
+            checkpoint.delete()
+            checkpoint = Checkpoint(checkpoint.path)
+        if checkpoint.position:
+            self.stdout.write(
+                f'Продолжение с записи {checkpoint.position}')
+
+        importer = Importer(checkpoint, options['batch_size'],
+                            options['source'] or os.path.basename(path))
+        started = time.monotonic()
+        imported = 0
+        try:
+            for count in importer.run(read_records(path, record_format)):
+                imported += count
+                rate = imported / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'{checkpoint.position} записей, {rate:.0f} записей/с')
+        except (KeyError, ValueError, IntegrityError) as error:
+            raise CommandError(
+                f'Ошибка в порции после записи {checkpoint.position}: '
+                f'{error!r}')
+        checkpoint.delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано записей: {imported}'))
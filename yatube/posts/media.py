@@ -0,0 +1,93 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .models import Post
+from .thumbnails import thumbnail_name
+
+ORIGINALS_DIR = Post._meta.get_field('image').upload_to
+
+
+def referenced_images():
+    return set(
+        Post.objects.exclude(image='').order_by()
+        .values_list('image', flat=True).distinct().iterator()
+    )
+
+
+def thumbnail_index(referenced):
+    """Разобрать KV-хранилище миниатюр.
+
+    Возвращает имена миниатюр картинок из referenced и ключи записей,
+    относящихся к картинкам, на которые посты больше не ссылаются.
+    Миниатюры из THUMBNAIL_GEOMETRIES живы и без записей: рабочие
+    процессы создают их, ничего не записывая в KV-хранилище.
+    """
+    image_prefix = add_prefix('', 'image')
+    thumbnails_prefix = add_prefix('', 'thumbnails')
+    names = {}
+    thumbnail_lists = {}
+    rows = KVStoreModel.objects.filter(
+        key__startswith=sorl_settings.THUMBNAIL_KEY_PREFIX
+    ).values_list('key', 'value').iterator()
+    for key, value in rows:
+        if key.startswith(image_prefix):
+            names[key[len(image_prefix):]] = json.loads(value)['name']
+        elif key.startswith(thumbnails_prefix):
+            thumbnail_lists[key[len(thumbnails_prefix):]] = json.loads(value)
+
+    live = {
+        thumbnail_name(name, geometry, options)
+        for name in referenced
+        for geometry, options in settings.THUMBNAIL_GEOMETRIES
+    }
+    stale_keys = []
+    for source_key, thumbnail_keys in thumbnail_lists.items():
+        if names.get(source_key) in referenced:
+            live.update(names[key] for key in thumbnail_keys if key in names)
+        else:
+            stale_keys.append(add_prefix(source_key, 'thumbnails'))
+            stale_keys.extend(
+                add_prefix(key, 'image')
+                for key in [source_key, *thumbnail_keys] if key in names
+            )
+    return live, stale_keys
+
+
+def walk(directory):
+    """Обойти файлы каталога по одному, не собирая список целиком."""
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def find_orphans(referenced, live, min_age):
+    """Найти оригиналы и миниатюры, на которые не ссылаются посты.
+
+    Порождает пары (путь, размер). Файлы моложе min_age секунд
+    пропускаются: их могла загрузить ещё не закоммиченная транзакция.
+    """
+    deadline = time.time() - min_age
+    scopes = (
+        (ORIGINALS_DIR, referenced),
+        (sorl_settings.THUMBNAIL_PREFIX, live),
+    )
+    for directory, keep in scopes:
+        for entry in walk(os.path.join(settings.MEDIA_ROOT, directory)):
+            name = os.path.relpath(entry.path, settings.MEDIA_ROOT)
+            name = name.replace(os.sep, '/')
+            stat = entry.stat(follow_symlinks=False)
+            if name not in keep and stat.st_mtime < deadline:
+                yield entry.path, stat.st_size
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Выгрузка')),
+                ('kind', models.CharField(max_length=16, verbose_name='Тип записи')),
+                ('old_id', models.CharField(max_length=64, verbose_name='id в выгрузке')),
+                ('new_id', models.PositiveIntegerField(verbose_name='Первичный ключ')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='importedrecord',
+            constraint=models.UniqueConstraint(fields=('source', 'kind', 'old_id'), name='unique_imported_record'),
+        ),
+    ]
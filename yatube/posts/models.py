@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import content_storage
+
 User = get_user_model()
 
 
@@ -8,6 +10,11 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Наименование')
     slug = models.SlugField(unique=True, verbose_name='Адрес группы')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self) -> str:
         return f'{self.title}'
@@ -22,6 +29,10 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True,
     )
+    modified = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -41,11 +52,28 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=content_storage,
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            # Keyset-пагинация лент по (pub_date, id).
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_id_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            # Проверка ссылок на файл в thumbnails.release.
+            models.Index(fields=['image'], name='post_image_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -104,3 +132,79 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique_follow')
         ]
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: пост автора у его подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста'
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        ordering = ['-pub_date', '-post']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        'Количество подписок',
+        default=0,
+    )
+    # Автор перестал быть популярным, его посты ещё не разложены по
+    # лентам подписчиков (см. manage.py backfill_timelines).
+    timeline_pending = models.BooleanField(
+        'Лента ждёт раскладки',
+        default=False,
+    )
+
+
+class ImportedRecord(models.Model):
+    """Соответствие id записи выгрузки и первичного ключа после импорта."""
+    source = models.CharField('Выгрузка', max_length=255)
+    kind = models.CharField('Тип записи', max_length=16)
+    old_id = models.CharField('id в выгрузке', max_length=64)
+    new_id = models.PositiveIntegerField('Первичный ключ')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'kind', 'old_id'],
+                                    name='unique_imported_record')
+        ]
@@ -0,0 +1,155 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .utils import CursorPaginator
+
+FTS_TABLE = 'posts_post_fts'
+
+INSTALL_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); "
+    f"END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    f"AFTER UPDATE OF text ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+)
+
+UNINSTALL_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def fts_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install_fts(using=connection):
+    """Создать индекс FTS5 и триггеры синхронизации с posts_post.
+
+    Пересборка таблицы posts_post миграциями SQLite удаляет триггеры,
+    поэтому функция идемпотентна и вызывается ещё и после migrate.
+    """
+    if not fts_available(using):
+        return
+    if Post._meta.db_table not in using.introspection.table_names():
+        return
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE],
+        )
+        created = cursor.fetchone() is None
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+        if created:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_fts(using=connection):
+    if not fts_available(using):
+        return
+    with using.cursor() as cursor:
+        for sql in UNINSTALL_SQL:
+            cursor.execute(sql)
+
+
+def search_ids(text):
+    """Подзапрос id постов, найденных FTS5; для фильтра pk__in."""
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [to_match_query(text)],
+    )
+
+
+def to_match_query(text):
+    """Превратить ввод пользователя в безопасный запрос MATCH.
+
+    Каждое слово берётся в кавычки (синтаксис FTS5 не интерпретируется),
+    последнее ищется по префиксу; слова объединяются через AND.
+    """
+    terms = re.findall(r'\w+', text or '')
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная пагинация результатов FTS5 по паре (rank, id)."""
+
+    cursor_fields = ('rank', 'id')
+
+    def __init__(self, match, per_page, group_id=None, author_id=None):
+        super().__init__(Post.objects.select_related('author', 'group'),
+                         per_page)
+        self.match = match
+        self.group_id = group_id
+        self.author_id = author_id
+
+    @staticmethod
+    def encode_cursor(obj):
+        return CursorPaginator.encode_raw(f'{obj.search_rank!r}|{obj.pk}')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        parts = CursorPaginator.decode_raw(cursor)
+        if parts is None:
+            return None
+        try:
+            return float(parts[0]), int(parts[1])
+        except ValueError:
+            return None
+
+    def _seek(self, position, newer):
+        if not self.match or not fts_available():
+            return []
+        sql = [
+            f'SELECT p.id, {FTS_TABLE}.rank FROM {FTS_TABLE} '
+            f'JOIN posts_post p ON p.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s'
+        ]
+        params = [self.match]
+        if self.group_id is not None:
+            sql.append('AND p.group_id = %s')
+            params.append(self.group_id)
+        if self.author_id is not None:
+            sql.append('AND p.author_id = %s')
+            params.append(self.author_id)
+        # Лучшие совпадения имеют меньший rank (bm25 отрицателен).
+        lookup, order = ('<', 'DESC') if newer else ('>', 'ASC')
+        if position is not None:
+            sql.append(
+                f'AND ({FTS_TABLE}.rank {lookup} %s '
+                f'OR ({FTS_TABLE}.rank = %s AND p.id {lookup} %s))'
+            )
+            params.extend([position[0], position[0], position[1]])
+        sql.append(f'ORDER BY {FTS_TABLE}.rank {order}, p.id {order} '
+                   f'LIMIT %s')
+        params.append(self.per_page + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            ranked = cursor.fetchall()
+        posts = self.object_list.in_bulk([pk for pk, _ in ranked])
+        rows = []
+        for pk, rank in ranked:
+            post = posts.get(pk)
+            if post is not None:
+                post.search_rank = rank
+                rows.append(post)
+        return rows
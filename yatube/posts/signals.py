@@ -0,0 +1,139 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, thumbnails, timeline
+from .search import install_fts
+from .cache import bump_author_version, bump_feed_version
+from .models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_stats_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_owners(sender, instance, raw=False, **kwargs):
+    if instance.pk is None or raw:
+        return
+    row = Post.objects.filter(pk=instance.pk).values_list(
+        'author_id', 'group_id', 'comments_count', 'image').first()
+    if row is not None:
+        # save() пишет все поля: не затираем счётчик устаревшим значением.
+        instance._old_owners = row[:2]
+        instance.comments_count = row[2]
+        instance._old_image = row[3]
+
+
+@receiver(pre_save, sender=Group)
+def group_keep_counter(sender, instance, raw=False, **kwargs):
+    if instance.pk is None or raw:
+        return
+    posts_count = Group.objects.filter(pk=instance.pk).values_list(
+        'posts_count', flat=True).first()
+    if posts_count is not None:
+        instance.posts_count = posts_count
+
+
+@receiver(post_save, sender=Post)
+def post_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_author, old_group = (
+        (None, None) if created
+        else getattr(instance, '_old_owners', None) or (None, None)
+    )
+    if created or old_author != instance.author_id:
+        counters.change_user(old_author, 'posts_count', -1)
+        counters.change_user(instance.author_id, 'posts_count', 1)
+    if created or old_group != instance.group_id:
+        counters.change_group(old_group, -1)
+        counters.change_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_counters_delete(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'posts_count', -1)
+    counters.change_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def post_release_image(sender, instance, created, raw=False, **kwargs):
+    old_image = getattr(instance, '_old_image', None)
+    if not raw and old_image and old_image != instance.image.name:
+        thumbnails.release(old_image)
+
+
+@receiver(post_delete, sender=Post)
+def post_release_image_delete(sender, instance, **kwargs):
+    thumbnails.release(instance.image.name)
+
+
+@receiver(post_save, sender=Comment)
+def comment_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_counters_delete(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user(instance.author_id, 'followers_count', 1)
+        counters.change_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_counters_delete(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'followers_count', -1)
+    counters.change_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_evict(sender, instance, **kwargs):
+    timeline.evict(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def feed_changed(sender, **kwargs):
+    bump_feed_version()
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login - ленты не меняются.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_feed_version()
+    if not created:
+        bump_author_version(instance.pk)
+
+
+def fts_after_migrate(sender, using, **kwargs):
+    # Пересборка posts_post в миграциях SQLite удаляет триггеры FTS5.
+    install_fts(connections[using])
@@ -0,0 +1,52 @@
+import fcntl
+import hashlib
+import os
+import posixpath
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, именующее файлы по SHA-256 содержимого.
+
+    Одинаковые загрузки получают одно имя вида posts/ab/abcd....gif и
+    хранятся один раз; миниатюры такого файла тоже общие. Файл удаляется,
+    когда на него не остаётся ссылок (см. thumbnails.release).
+    Повторная загрузка обновляет время изменения файла: так release
+    видит, что файл снова нужен ещё не закоммиченному посту.
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        hexdigest = digest.hexdigest()
+        return posixpath.join(directory, hexdigest[:2], hexdigest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        with self.lock():
+            if self.exists(name):
+                os.utime(self.path(name))
+                return name
+            return self._save(name, content)
+
+    @contextmanager
+    def lock(self):
+        """Межпроцессная блокировка сохранения и удаления файлов."""
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
+content_storage = ContentAddressedStorage()
@@ -0,0 +1,13 @@
+from django import template
+
+from ..models import Follow
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def is_following(context, username):
+    """Подписан ли текущий пользователь на автора username."""
+    user = context['user']
+    return user.is_authenticated and Follow.objects.filter(
+        user=user, author__username=username).exists()
@@ -0,0 +1,46 @@
+import logging
+
+from django import template
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.profiling import timer
+
+register = template.Library()
+logger = logging.getLogger(__name__)
+
+
+def srcset(thumbnails):
+    return ', '.join(f'{im.url} {im.width}w' for im in thumbnails)
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(image, sizes='(min-width: 992px) 960px, 100vw',
+                 css_class='card-img my-2'):
+    """Картинка поста: <picture> с WebP и запасным форматом в srcset."""
+    if not image:
+        return {}
+    variants = {}
+    try:
+        with timer('thumbnails'):
+            for geometry, options in settings.THUMBNAIL_GEOMETRIES:
+                thumbnail = get_thumbnail(image, geometry, **options)
+                if not thumbnail.size:
+                    # Исходный файл недоступен: миниатюра не создана.
+                    return {}
+                variants.setdefault(
+                    options.get('format'), []).append(thumbnail)
+    except Exception:
+        logger.exception('Не удалось получить миниатюры %s', image)
+        return {}
+    fallback = variants.pop(None)
+    return {
+        'sources': [
+            (f'image/{image_format.lower()}', srcset(thumbnails))
+            for image_format, thumbnails in variants.items()
+        ],
+        'image': fallback[-1],
+        'srcset': srcset(fallback),
+        'sizes': sizes,
+        'css_class': css_class,
+    }
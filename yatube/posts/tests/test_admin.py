@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+from ..utils import ApproximateCountPaginator
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def create_rows(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                text=f'Пост номер {i}', author=self.admin, group=self.group)
+            Comment.objects.create(
+                post=post, author=self.admin, text=f'Комментарий {i}')
+
+    def changelist_queries(self, model_name):
+        url = reverse(f'admin:posts_{model_name}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_comment_changelist_does_not_list_every_post(self):
+        """Проверить: в списке комментариев нет выпадающего списка постов."""
+        self.create_rows(5)
+        response, _ = self.changelist_queries('comment')
+        html = response.content.decode()
+        for post in Post.objects.all():
+            self.assertEqual(html.count(f'<option value="{post.pk}"'), 1)
+
+    def test_group_choices_are_built_once(self):
+        """Проверить: выбор группы не запрашивается в каждой строке."""
+        self.create_rows(3)
+        # Первый запрос кеширует число строк списка.
+        self.changelist_queries('post')
+        _, few_rows = self.changelist_queries('post')
+        self.create_rows(10)
+        _, more_rows = self.changelist_queries('post')
+        self.assertEqual(few_rows, more_rows)
+
+    def test_approximate_count_without_filters(self):
+        """Проверить: без фильтров число строк берётся из кеша COUNT."""
+        self.create_rows(3)
+        Post.objects.filter(text='Пост номер 0').delete()
+        paginator = ApproximateCountPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 2)
+        self.create_rows(1)
+        with self.assertNumQueries(0):
+            paginator = ApproximateCountPaginator(Post.objects.all(), 10)
+            self.assertEqual(paginator.count, 2)
+        cache.clear()
+        paginator = ApproximateCountPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 3)
+        paginator = ApproximateCountPaginator(
+            Post.objects.filter(group=self.group), 10)
+        self.assertEqual(paginator.count, 3)
+
+    def test_search_punctuation_only(self):
+        """Проверить: поиск из одних знаков препинания не роняет список."""
+        self.create_rows(2)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': '!!!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list), [])
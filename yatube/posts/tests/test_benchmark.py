@@ -0,0 +1,46 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from .. import benchmark
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class BenchmarkTests(TestCase):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_run(self):
+        """Проверить: замер всех сценариев на маленьком наборе."""
+        benchmark.load({'users': 10, 'groups': 2, 'posts': 30,
+                        'comments': 20, 'follows': 3}, images=1)
+        results = benchmark.run(iterations=2)
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_detail',
+            'follow_index', 'post_create',
+        })
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertGreater(result['queries'], 0)
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+    def test_compare(self):
+        """Проверить: рост запросов и p95 сверх допуска - регрессия."""
+        baseline = {'small': {
+            'index': {'p95_ms': 10, 'queries': 2},
+            'profile': {'p95_ms': 10, 'queries': 3},
+        }}
+        results = {'small': {
+            'index': {'p95_ms': 14, 'queries': 2},
+            'profile': {'p95_ms': 16, 'queries': 4},
+            'search': {'p95_ms': 100, 'queries': 10},
+        }}
+        regressions = benchmark.compare(results, baseline, tolerance=0.5)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(line.startswith('small/profile')
+                            for line in regressions))
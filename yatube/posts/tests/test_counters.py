@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def assertCounters(self):
+        self.author.stats.refresh_from_db()
+        self.reader.stats.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.author.stats.posts_count,
+                         Post.objects.filter(author=self.author).count())
+        self.assertEqual(self.author.stats.followers_count,
+                         Follow.objects.filter(author=self.author).count())
+        self.assertEqual(self.reader.stats.following_count,
+                         Follow.objects.filter(user=self.reader).count())
+        self.assertEqual(self.group.posts_count,
+                         Post.objects.filter(group=self.group).count())
+        self.assertEqual(self.other_group.posts_count,
+                         Post.objects.filter(group=self.other_group).count())
+        for post in Post.objects.all():
+            self.assertEqual(post.comments_count, post.comments.count())
+
+    def test_counters_follow_create_edit_delete(self):
+        """Проверить: счётчики меняются при создании, правке и удалении."""
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   group=self.group)
+        Post.objects.create(text='Второй пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertCounters()
+
+        post.group = self.other_group
+        post.save()
+        self.assertCounters()
+
+        Comment.objects.all().delete()
+        follow.delete()
+        post.delete()
+        self.assertCounters()
+
+    def test_recount_command_repairs_counters(self):
+        """Проверить: recount_counters чинит рассинхронизированные счётчики."""
+        Post.objects.create(text='Пост', author=self.author, group=self.group)
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.update(posts_count=42, followers_count=0)
+        AuthorStats.objects.filter(user=self.reader).delete()
+        Group.objects.update(posts_count=7)
+
+        call_command('recount_counters', stdout=open('/dev/null', 'w'))
+
+        self.reader = User.objects.get(pk=self.reader.pk)
+        self.assertCounters()
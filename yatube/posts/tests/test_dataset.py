@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..dataset import generate_records
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def records(seed):
+    return list(generate_records(
+        seed, users=30, groups=3, posts=200, comments=100, follows=5,
+        image_names=['posts/a.png'], image_ratio=0.5,
+    ))
+
+
+class GenerateRecordsTests(TestCase):
+    def test_deterministic(self):
+        """Проверить: один seed - один и тот же набор, другой - другой."""
+        self.assertEqual(records(1), records(1))
+        self.assertNotEqual(records(1), records(2))
+
+    def test_skewed_authors(self):
+        """Проверить: большую часть постов пишут немногие авторы."""
+        authors = Counter(record['author'] for record in records(1)
+                          if record['type'] == 'post')
+        top = sum(count for _, count in authors.most_common(3))
+        self.assertGreater(top, 200 * 3 / 30 * 2)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class GenerateDatasetCommandTests(TestCase):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_command(self):
+        """Проверить: команда создаёт заданное число записей."""
+        out = StringIO()
+        call_command(
+            'generate_dataset', '--users=20', '--groups=2', '--posts=50',
+            '--comments=40', '--follows=3', '--images=2',
+            '--image-ratio=0.5', '--batch-size=30', stdout=out,
+        )
+        self.assertIn('записей/с', out.getvalue())
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertEqual(
+            Post.objects.exclude(image='').values('image').distinct()
+            .count(), 2)
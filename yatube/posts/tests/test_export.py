@@ -0,0 +1,31 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class ExportCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        post = Post.objects.create(text='Пост', author=cls.user)
+        Comment.objects.create(post=post, author=cls.user, text='Ответ')
+
+    def test_export_to_stdout(self):
+        """Проверить: export_posts выводит все записи автора."""
+        out = StringIO()
+        call_command('export_posts', 'author', '--format=csv', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('type,id,post_id'))
+
+    def test_unknown_user(self):
+        """Проверить: неизвестный пользователь - ошибка команды."""
+        with self.assertRaises(CommandError):
+            call_command('export_posts', 'missing', stdout=StringIO())
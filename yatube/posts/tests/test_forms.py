@@ -1,14 +1,23 @@
+import hashlib
 import shutil
+import struct
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpRequest
+from django.http.multipartparser import MultiPartParser
 from django.test import Client, TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
 from django.urls import reverse
+from PIL import Image
 
+from ..forms import PostForm
 from ..models import Comment, Follow, Group, Post
+from ..uploads import SizeLimitUploadHandler
 
 User = get_user_model()
 
@@ -38,6 +47,8 @@ class PostCreateFormTests(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        digest = hashlib.sha256(cls.small_gif).hexdigest()
+        cls.image_name = f'posts/{digest[:2]}/{digest}.gif'
 
     def setUp(self) -> None:
         """Создать клиент, point_to_disk."""
@@ -54,6 +65,19 @@ class PostCreateFormTests(TestCase):
     def tearDown(self) -> None:
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=10)
+    def test_oversized_upload_rejected(self):
+        """Проверить: оборванная загрузка - ошибка формы, пост не создан."""
+        post_count = Post.objects.count()
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с большой картинкой', 'image': self.uploaded},
+        )
+        self.assertEqual(Post.objects.count(), post_count)
+        self.assertEqual(
+            response.context['form'].errors.as_data()['image'][0].code,
+            'file_too_large')
+
     def test_create_newrecord_by_sendform(self):
         post_count = Post.objects.count()
         form_data = {
@@ -71,7 +95,7 @@ class PostCreateFormTests(TestCase):
             Post.objects.filter(
                 text=form_data['text'],
                 group=form_data['group'],
-                image='posts/small.gif'
+                image=self.image_name
             ).exists()
         )
         self.assertRedirects(
@@ -79,7 +103,7 @@ class PostCreateFormTests(TestCase):
             reverse('posts:profile', kwargs={'username': self.user.username})
         )
         self.assertEqual(
-            response.context.get('page_obj')[0].image, 'posts/small.gif')
+            response.context.get('page_obj')[0].image, self.image_name)
 
     def test_edit_existsrecord_by_sendform(self):
         post_count = Post.objects.count()
@@ -98,7 +122,7 @@ class PostCreateFormTests(TestCase):
             Post.objects.filter(
                 text=form_data['text'],
                 group=form_data['group'],
-                image='posts/small.gif'
+                image=self.image_name
             ).exists()
         )
         self.assertRedirects(
@@ -110,7 +134,7 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(
             response_post.context['post'].group.id, form_data['group'])
         self.assertEqual(
-            response_post.context['post'].image, 'posts/small.gif')
+            response_post.context['post'].image, self.image_name)
 
     def test_show_image_in_page_by_context(self):
         form_data = {
@@ -130,7 +154,7 @@ class PostCreateFormTests(TestCase):
             )
         )
         self.assertEqual(
-            response_get.context['post'].image, 'posts/small.gif'
+            response_get.context['post'].image, self.image_name
         )
         reverse_context = {
             reverse('posts:index'):
@@ -142,10 +166,11 @@ class PostCreateFormTests(TestCase):
         }
         for reverse_item, context_item in reverse_context.items():
             with self.subTest(reverse_item=reverse_item):
+                cache.clear()
                 response_get = self.authorized_client.get(reverse_item)
                 self.assertEqual(
                     response_get.context.get(context_item)[0].image,
-                    'posts/small.gif'
+                    self.image_name
                 )
 
     def test_comment_by_authorized_user(self):
@@ -189,6 +214,80 @@ class PostCreateFormTests(TestCase):
         self.assertIsNone(response_post.context.get('comments'))
 
 
+@override_settings(IMAGE_MAX_SIDE=50)
+class ImageIngestTests(TestCase):
+    @staticmethod
+    def upload(size, image_format='PNG'):
+        buffer = BytesIO()
+        Image.new('RGB', size, (255, 0, 0)).save(buffer, image_format)
+        return SimpleUploadedFile(
+            f'image.{image_format.lower()}', buffer.getvalue(),
+            f'image/{image_format.lower()}')
+
+    def clean(self, upload):
+        form = PostForm({'text': 'Пост'}, files={'image': upload})
+        form.is_valid()
+        return form
+
+    def test_small_image_kept(self):
+        """Проверить: картинка в пределах лимитов не перекодируется."""
+        upload = self.upload((40, 20))
+        form = self.clean(upload)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    def test_large_image_downsampled(self):
+        """Проверить: большая картинка уменьшается при загрузке."""
+        form = self.clean(self.upload((200, 100), 'JPEG'))
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.size, (50, 25))
+        self.assertEqual(image.format, 'JPEG')
+
+    def test_unwritable_format_converted(self):
+        """Проверить: формат, который Pillow не пишет, сохраняется в JPEG."""
+        width, height = 100, 10
+        header = struct.pack('>8I', 0x59a66a95, width, height, 24,
+                             width * height * 3, 1, 0, 0)
+        upload = SimpleUploadedFile(
+            'image.ras', header + b'\x80' * width * height * 3,
+            'image/x-sun-raster')
+        form = self.clean(upload)
+        self.assertTrue(form.is_valid(), form.errors)
+        image = form.cleaned_data['image']
+        self.assertEqual(image.name, 'image.jpg')
+        self.assertEqual(Image.open(image).format, 'JPEG')
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=10)
+    def test_file_size_limit(self):
+        """Проверить: файл больше IMAGE_UPLOAD_MAX_SIZE отклоняется."""
+        form = self.clean(self.upload((40, 20)))
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'file_too_large')
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_upload_not_read(self):
+        """Проверить: приём большого файла обрывается до конца тела."""
+        body = encode_multipart(BOUNDARY, {
+            'image': SimpleUploadedFile('big.png', b'0' * 2 ** 20)})
+        stream = BytesIO(body)
+        request = HttpRequest()
+        parser = MultiPartParser(
+            {'CONTENT_TYPE': MULTIPART_CONTENT,
+             'CONTENT_LENGTH': len(body)},
+            stream, [SizeLimitUploadHandler(request)],
+        )
+        post, files = parser.parse()
+        self.assertFalse(files)
+        self.assertEqual(request.oversized_uploads, {'image'})
+        self.assertLess(stream.tell(), len(body) // 4)
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_pixel_limit(self):
+        """Проверить: картинка больше IMAGE_MAX_PIXELS отклоняется."""
+        form = self.clean(self.upload((40, 20)))
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'too_many_pixels')
+
+
 class PostCacheTests(TestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -199,23 +298,39 @@ class PostCacheTests(TestCase):
             text='ШЕСТАЯ запись'
         )
 
+    def setUp(self) -> None:
+        cache.clear()
+
     def test_cache_in_index_page(self):
         response_get_1 = self.client.get(reverse('posts:index'))
         content_before_del = len(response_get_1.content)
-        count_before_del = Post.objects.count()
-
-        self.post_obj.delete()
-
-        self.assertEqual(count_before_del - 1, Post.objects.count())
 
-        # before: cache clear
+        # изменение в обход сигналов: страница отдаётся из кеша
+        Post.objects.filter(pk=self.post_obj.pk).update(text='СЕДЬМАЯ')
         response_get_2 = self.client.get(reverse('posts:index'))
         self.assertEqual(content_before_del, len(response_get_2.content))
 
         # after: cache clear
         cache.clear()
         response_get_3 = self.client.get(reverse('posts:index'))
-        self.assertNotEqual(content_before_del, len(response_get_3.content))
+        self.assertContains(response_get_3, 'СЕДЬМАЯ')
+
+    def test_index_cache_invalidated_on_post_delete(self):
+        """Проверить: удаление поста сразу сбрасывает кеш index."""
+        response_get_1 = self.client.get(reverse('posts:index'))
+        self.assertContains(response_get_1, self.post_obj.text)
+
+        self.post_obj.delete()
+
+        response_get_2 = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response_get_2, self.post_obj.text)
+
+    def test_index_cache_invalidated_on_new_post(self):
+        """Проверить: новый пост сразу виден на закешированной index."""
+        self.client.get(reverse('posts:index'))
+        Post.objects.create(author=self.user, text='ВОСЬМАЯ запись')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'ВОСЬМАЯ запись')
 
 
 class PostFollowTests(TestCase):
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+RECORDS = [
+    {'type': 'user', 'id': 10, 'username': 'leo'},
+    {'type': 'user', 'id': 11, 'username': 'kit'},
+    {'type': 'group', 'slug': 'cats', 'title': 'Кошки'},
+    {'type': 'post', 'id': 1, 'author': 10, 'group': 'cats',
+     'text': 'Первый', 'pub_date': '2020-01-01T10:00:00'},
+    {'type': 'post', 'id': 2, 'author': 10, 'text': 'Второй',
+     'pub_date': '2020-01-02T10:00:00+00:00'},
+    {'type': 'follow', 'user': 11, 'author': 10},
+    {'type': 'comment', 'id': 1, 'post': 1, 'author': 11,
+     'text': 'Комментарий', 'created': '2020-01-03T10:00:00'},
+]
+
+
+class ImportCommandTests(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'dump.ndjson')
+        self.write(RECORDS)
+        # Уже существующий пост: импорт не должен конфликтовать с ним.
+        self.existing = Post.objects.create(
+            text='Старый', author=User.objects.create_user(username='old'))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, records):
+        with open(self.path, 'w', encoding='utf-8') as target:
+            for record in records:
+                target.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command('import_content', self.path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_import(self):
+        """Проверить: записи, даты, счётчики и ленты после импорта."""
+        out = self.run_import('--batch-size=3')
+        self.assertIn('записей/с', out)
+        leo = User.objects.get(username='leo')
+        kit = User.objects.get(username='kit')
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.group, Group.objects.get(slug='cats'))
+        self.assertEqual(first.pub_date.year, 2020)
+        self.assertEqual(first.comments_count, 1)
+        self.assertEqual(Comment.objects.get().created.day, 3)
+        self.assertTrue(Follow.objects.filter(user=kit, author=leo).exists())
+        self.assertEqual(leo.stats.posts_count, 2)
+        self.assertEqual(leo.stats.followers_count, 1)
+        self.assertEqual(Group.objects.get(slug='cats').posts_count, 1)
+        self.assertEqual(TimelineEntry.objects.filter(user=kit).count(), 2)
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_resume_from_checkpoint(self):
+        """Проверить: после сбоя импорт продолжается без дублей."""
+        self.write(RECORDS + [{'type': 'post', 'id': 3, 'author': 99,
+                               'text': 'Неизвестный автор'}])
+        with self.assertRaises(CommandError):
+            self.run_import('--batch-size=4')
+        with open(f'{self.path}.checkpoint', encoding='utf-8') as source:
+            self.assertEqual(json.load(source)['position'], 4)
+        self.write(RECORDS)
+        out = self.run_import('--batch-size=4')
+        self.assertIn('Продолжение с записи 4', out)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_second_import_does_not_collide(self):
+        """Проверить: посты между импортами не перекрывают новые ключи."""
+        self.run_import()
+        Post.objects.create(text='Живой', author=self.existing.author)
+        self.write([
+            {'type': 'user', 'id': 10, 'username': 'max'},
+            {'type': 'post', 'id': 1, 'author': 10, 'text': 'Другой'},
+            {'type': 'comment', 'id': 1, 'post': 1, 'author': 10,
+             'text': 'К другому'},
+        ])
+        call_command('import_content', self.path, '--source=second',
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 5)
+        comment = Comment.objects.get(text='К другому')
+        self.assertEqual(comment.post.text, 'Другой')
+        self.assertEqual(comment.post.author.username, 'max')
+
+    def test_repeated_import_skips_records(self):
+        """Проверить: повторный импорт той же выгрузки ничего не дублирует."""
+        self.run_import()
+        self.run_import()
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_existing_username_is_an_error(self):
+        """Проверить: занятое имя - ошибка, а не слияние с аккаунтом."""
+        self.write([{'type': 'user', 'id': 1, 'username': 'old'}])
+        with self.assertRaisesMessage(CommandError, 'old'):
+            self.run_import()
+        self.assertEqual(User.objects.filter(username='old').count(), 1)
+
+    def test_invalid_date_is_reported(self):
+        """Проверить: неверная дата - ошибка команды с этой датой."""
+        self.write(RECORDS[:2] + [{'type': 'post', 'id': 1, 'author': 10,
+                                   'text': 'Пост', 'pub_date': 'вчера'}])
+        with self.assertRaisesMessage(CommandError, 'вчера'):
+            self.run_import()
+        self.assertFalse(Post.objects.filter(text='Пост').exists())
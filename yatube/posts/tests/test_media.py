@@ -0,0 +1,86 @@
+import os
+import shutil
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from sorl.thumbnail import default
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .. import thumbnails
+from ..kvstore import KVStore
+from ..models import Post
+from .utils import MediaTestCase, image_file
+
+User = get_user_model()
+
+
+class CollectMediaTests(MediaTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self) -> None:
+        super().setUp()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        self.kept = Post.objects.create(
+            text='Пост', author=self.user, image=image_file(color=(0, 0, 255)))
+        self.orphan = Post.objects.create(
+            text='Пост', author=self.user, image=image_file(color=(255, 0, 0)))
+        for post in (self.kept, self.orphan):
+            thumbnails.generate_thumbnails(post.image.name)
+        # Удаление мимо сигналов: файл и миниатюры остаются на диске.
+        Post.objects.filter(pk=self.orphan.pk).update(image='')
+
+    def media_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, files in os.walk(self.media_root) for name in files
+            if not name.startswith('.')
+        )
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command('collect_media', '--min-age=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_orphans_removed(self):
+        """Проверить: удаляются только файлы, на которые нет ссылок."""
+        per_image = len(settings.THUMBNAIL_GEOMETRIES) + 1
+        self.assertEqual(len(self.media_files()), 2 * per_image)
+        self.collect('--batch-size=2')
+        files = self.media_files()
+        self.assertEqual(len(files), per_image)
+        self.assertIn(self.kept.image.name, files)
+        self.assertFalse(KVStoreModel.objects.filter(
+            value__contains=self.orphan.image.name).exists())
+
+    def test_dry_run(self):
+        """Проверить: --dry-run ничего не удаляет."""
+        before = self.media_files()
+        out = self.collect('--dry-run')
+        self.assertEqual(self.media_files(), before)
+        self.assertIn(self.orphan.image.name, out)
+
+    def test_min_age(self):
+        """Проверить: свежие файлы не удаляются."""
+        before = self.media_files()
+        call_command('collect_media', stdout=StringIO())
+        self.assertEqual(self.media_files(), before)
+
+    def test_pregenerated_thumbnails_kept(self):
+        """Проверить: миниатюры рабочих процессов без записей KV живы."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=image_file(color=(0, 255, 0)))
+        default.kvstore._wrapped = thumbnails.NullKVStore()
+        thumbnails.generate_thumbnails(post.image.name)
+        default.kvstore._wrapped = KVStore()
+        expected = {
+            thumbnails.thumbnail_name(post.image.name, geometry, options)
+            for geometry, options in settings.THUMBNAIL_GEOMETRIES
+        }
+        self.assertTrue(expected <= set(self.media_files()))
+        self.collect()
+        self.assertTrue(expected <= set(self.media_files()))
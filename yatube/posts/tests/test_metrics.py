@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_METRICS_DIR = tempfile.mkdtemp()
+
+INDEX_REQUESTS = ('yatube_requests_total'
+                  '{method="GET",status="200",view="posts:index"}')
+
+
+def record_request():
+    metrics.inc('yatube_requests_total', {
+        'view': 'posts:index', 'method': 'GET', 'status': '200'})
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        Post.objects.create(text='Пост',
+                            author=User.objects.create_user(username='leo'))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def metrics(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def value(self, text, sample):
+        for line in text.splitlines():
+            if line.startswith(sample + ' '):
+                return float(line.rsplit(' ', 1)[1])
+        return 0.0
+
+    def test_views_cache_and_database(self):
+        """Проверить: запросы, гистограмма, кеш и SQL по имени view."""
+        before = self.metrics()
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        text = self.metrics()
+        self.assertEqual(self.value(text, INDEX_REQUESTS)
+                         - self.value(before, INDEX_REQUESTS), 2)
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="posts:index",le="+Inf"}', text)
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', text)
+        self.assertIn('yatube_cache_hit_ratio{kind="page"}', text)
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      text)
+
+    def test_aggregated_across_processes(self):
+        """Проверить: значения других процессов суммируются."""
+        before = self.value(self.metrics(), INDEX_REQUESTS)
+        record_request()
+        process = multiprocessing.get_context('fork').Process(
+            target=record_request)
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(
+            self.value(self.metrics(), INDEX_REQUESTS) - before, 2)
+
+    def test_dead_process_merged(self):
+        """Проверить: файл завершившегося процесса сливается и удаляется."""
+        before = self.value(self.metrics(), INDEX_REQUESTS)
+        process = multiprocessing.get_context('fork').Process(
+            target=record_request)
+        process.start()
+        process.join()
+        dead_file = os.path.join(TEMP_METRICS_DIR, f'{process.pid}.db')
+        self.assertTrue(os.path.exists(dead_file))
+        self.assertEqual(
+            self.value(self.metrics(), INDEX_REQUESTS) - before, 1)
+        self.assertFalse(os.path.exists(dead_file))
+        self.assertTrue(os.path.exists(
+            os.path.join(TEMP_METRICS_DIR, metrics.MERGED)))
+        self.assertEqual(
+            self.value(self.metrics(), INDEX_REQUESTS) - before, 1)
+
+    def test_forbidden_for_other_addresses(self):
+        """Проверить: метрики недоступны с чужих адресов."""
+        response = self.client.get(reverse('metrics'),
+                                   REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
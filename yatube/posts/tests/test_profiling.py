@@ -0,0 +1,58 @@
+import json
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from ..models import Post
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        Post.objects.create(text='Пост',
+                            author=User.objects.create_user(username='leo'))
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request(self):
+        """Проверить: Server-Timing и строка лога для запроса в выборке."""
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertTrue(timing.startswith('total;dur='))
+        self.assertIn('sql;dur=', timing)
+        self.assertIn('template;dur=', timing)
+        self.assertIn('cache;desc="hit=', timing)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['counts']['cache_miss:page'], 1)
+
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['counts']['cache_hit:page'], 1)
+        self.assertNotIn('sql', record['counts'])
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_not_sampled_request(self):
+        """Проверить: вне выборки заголовка нет и замеры не ведутся."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertIsNone(profiling.current())
+
+    def test_profile_line_reaches_handler(self):
+        """Проверить: настройки логов выводят строки профиля на INFO."""
+        logger = logging.getLogger('core.profiling')
+        self.assertTrue(logger.isEnabledFor(logging.INFO))
+        self.assertTrue(logger.handlers)
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetExceeded, query_budget
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(12):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(title=f'Группа {i}', slug=f'g{i}')
+            Follow.objects.create(user=cls.user, author=author)
+            Post.objects.create(text=f'Пост {i}', author=author, group=group)
+            Post.objects.create(text=f'Пост группы {i}', author=cls.user,
+                                group=cls.group)
+        cls.post = Post.objects.filter(author=cls.user).first()
+        for i in range(12):
+            Comment.objects.create(
+                post=cls.post, text=f'Комментарий {i}',
+                author=User.objects.get(username=f'author{i}'),
+            )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_views_stay_within_query_budget(self):
+        """Проверить: листинги укладываются в бюджет при росте данных."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author1'}),
+            reverse('posts:profile', kwargs={'username': 'author1'})
+            + '?page=1',
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_exceeded_budget_raises_in_strict_mode(self):
+        """Проверить: превышение бюджета роняет тест в строгом режиме."""
+        @query_budget(1)
+        def view(request):
+            return [post.author.username for post in Post.objects.all()]
+
+        with self.assertRaises(QueryBudgetExceeded):
+            view(None)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..search import search_ids
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Кошки', slug='cats')
+        cls.cat_post = Post.objects.create(
+            text='Кошка спит на диване', author=cls.user, group=cls.group)
+        cls.other_post = Post.objects.create(
+            text='Кошка и кошка играют с кошкой', author=cls.other)
+        cls.dog_post = Post.objects.create(
+            text='Собака гуляет', author=cls.user)
+
+    def setUp(self) -> None:
+        self.guest_client = Client()
+
+    def search(self, **params):
+        response = self.guest_client.get(reverse('posts:search'), params)
+        return [post.id for post in response.context['page_obj']]
+
+    def test_search_is_ranked(self):
+        """Проверить: поиск находит посты и ранжирует по релевантности."""
+        self.assertEqual(self.search(q='кошка'),
+                         [self.other_post.id, self.cat_post.id])
+
+    def test_search_by_prefix_and_filters(self):
+        """Проверить: поиск по префиксу и фильтры группы и автора."""
+        self.assertEqual(self.search(q='соб'), [self.dog_post.id])
+        self.assertEqual(self.search(q='кошка', group='cats'),
+                         [self.cat_post.id])
+        self.assertEqual(self.search(q='кошка', author='other'),
+                         [self.other_post.id])
+
+    def test_index_follows_post_changes(self):
+        """Проверить: индекс обновляется при правке и удалении поста."""
+        post = Post.objects.create(text='Енот ест', author=self.user)
+        post.text = 'Енот спит'
+        post.save()
+        self.assertCountEqual(self.search(q='спит'),
+                              [self.cat_post.id, post.id])
+        post.delete()
+        self.assertEqual(self.search(q='енот'), [])
+
+    def test_search_cursor_pagination(self):
+        """Проверить: курсорные страницы поиска без пропусков и дублей."""
+        Post.objects.bulk_create(
+            Post(text=f'Попугай номер {i}', author=self.user)
+            for i in range(15)
+        )
+        response = self.guest_client.get(reverse('posts:search'),
+                                         {'q': 'попугай'})
+        first_page = response.context['page_obj']
+        self.assertEqual(len(first_page), 10)
+        response = self.guest_client.get(reverse('posts:search'), {
+            'q': 'попугай', 'after': first_page.paginator.next_cursor})
+        second_page = response.context['page_obj']
+        ids = {post.id for post in first_page} | {
+            post.id for post in second_page}
+        self.assertEqual(len(second_page), 5)
+        self.assertEqual(len(ids), 15)
+
+    def test_search_syntax_is_escaped(self):
+        """Проверить: спецсимволы FTS5 во вводе не ломают поиск."""
+        self.assertEqual(self.search(q='"кошка:* ('),
+                         [self.other_post.id, self.cat_post.id])
+        self.assertEqual(
+            set(Post.objects.filter(pk__in=search_ids('собака'))),
+            {self.dog_post})
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.slow_queries import fingerprint, read
+from ..models import Follow, Post
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp()
+LOG = os.path.join(TEMP_DIR, 'slow.ndjson')
+
+
+@override_settings(SLOW_QUERY_LOG=LOG)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='leo')
+        Follow.objects.create(user=cls.user, author=author)
+        Post.objects.create(text='Пост', author=author)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        if os.path.exists(LOG):
+            os.remove(LOG)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_fingerprint(self):
+        """Проверить: литералы и длина списка IN не меняют отпечаток."""
+        first = fingerprint('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 10')
+        second = fingerprint('SELECT * FROM t  WHERE id IN (%s) LIMIT 20')
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], 'SELECT * FROM t WHERE id IN (...) LIMIT ?')
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_logged_with_plan(self):
+        """Проверить: запись с view и планом, отчёт по отпечаткам."""
+        self.client.get(reverse('posts:follow_index'))
+        entries = [entry for entry in read(LOG)
+                   if entry['view'] == 'posts:follow_index']
+        self.assertTrue(entries)
+        selects = [entry for entry in entries
+                   if entry['sql'].startswith('SELECT')]
+        self.assertTrue(all(entry['plan'] for entry in selects))
+        self.assertRegex(selects[0]['plan'], 'SCAN|SEARCH')
+
+        out = StringIO()
+        call_command('slow_queries', '--log', LOG, '--top', '3', stdout=out)
+        self.assertIn('posts:follow_index', out.getvalue())
+        self.assertEqual(out.getvalue().count(' раз, всего '), 3)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        """Проверить: при пороге None журнал не пишется."""
+        self.client.get(reverse('posts:follow_index'))
+        self.assertFalse(os.path.exists(LOG))
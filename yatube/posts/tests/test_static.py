@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.css = staticfiles_storage.stored_name('css/bootstrap.min.css')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.client = Client()
+
+    def test_pages_use_fingerprinted_names(self):
+        """Проверить: шаблоны ссылаются на статику с хешем в имени."""
+        self.assertRegex(self.css, r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        response = self.client.get(reverse('about:author'))
+        self.assertContains(response, f'/static/{self.css}')
+
+    def test_fingerprinted_file_immutable_gzip(self):
+        """Проверить: файл с хешем отдаётся сжатым и с immutable."""
+        response = self.client.get(f'/static/{self.css}',
+                                   HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_plain_file_revalidated(self):
+        """Проверить: файл без хеша отдаётся без сжатия и с no-cache."""
+        response = self.client.get('/static/css/bootstrap.min.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        not_modified = self.client.get(
+            '/static/css/bootstrap.min.css',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_missing_file(self):
+        """Проверить: несуществующий файл и выход за STATIC_ROOT - 404."""
+        for path in ('/static/css/missing.css', '/static/../manage.py'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 404)
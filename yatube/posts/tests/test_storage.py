@@ -0,0 +1,76 @@
+import os
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+
+from .. import thumbnails
+from ..models import Post
+from ..storage import content_storage
+from .utils import MediaTestCase, image_file, run_on_commit
+
+User = get_user_model()
+
+
+@mock.patch('posts.thumbnails.transaction.on_commit', run_on_commit)
+class ContentAddressedStorageTests(MediaTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def create_post(self, image):
+        return Post.objects.create(text='Пост', author=self.user, image=image)
+
+    def test_identical_uploads_share_file(self):
+        """Проверить: одинаковые загрузки хранятся одним файлом."""
+        first = self.create_post(image_file('a.png'))
+        second = self.create_post(image_file('b.png'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name,
+                         r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        other = self.create_post(image_file('a.png', color=(255, 0, 0)))
+        self.assertNotEqual(other.image.name, first.image.name)
+
+    def test_file_deleted_with_last_reference(self):
+        """Проверить: файл и миниатюры удаляются с последним постом."""
+        first = self.create_post(image_file())
+        second = self.create_post(image_file())
+        name = first.image.name
+        thumbnails.generate_thumbnails(name)
+        cache_dir = os.path.join(self.media_root, 'cache')
+        self.assertTrue(os.listdir(cache_dir))
+        first.delete()
+        self.assertTrue(content_storage.exists(name))
+        second.delete()
+        self.assertFalse(content_storage.exists(name))
+        self.assertEqual(
+            [files for _, _, files in os.walk(cache_dir) if files], [])
+
+    def test_replaced_image_released(self):
+        """Проверить: заменённая картинка удаляется, если не используется."""
+        post = self.create_post(image_file())
+        old_name = post.image.name
+        post.image = image_file(color=(0, 255, 0))
+        post.save()
+        self.assertFalse(content_storage.exists(old_name))
+        self.assertTrue(content_storage.exists(post.image.name))
+
+    def test_reuploaded_file_kept(self):
+        """Проверить: файл, загруженный заново до удаления, остаётся."""
+        post = self.create_post(image_file())
+        name = post.image.name
+        callbacks = []
+        with mock.patch('posts.thumbnails.transaction.on_commit',
+                        callbacks.append):
+            post.delete()
+        # Пост с той же картинкой ещё не закоммичен: ссылок в БД нет.
+        self.assertEqual(
+            content_storage.save('posts/b.png', image_file()), name)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(content_storage.exists(name))
+
+    def test_reference_check_uses_index(self):
+        """Проверить: проверка ссылок на файл идёт по индексу."""
+        plan = Post.objects.filter(image='posts/ab/ab.png').explain()
+        self.assertIn('post_image_idx', plan)
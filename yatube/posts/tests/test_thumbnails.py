@@ -0,0 +1,121 @@
+import os
+import shutil
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import default, get_thumbnail
+
+from .. import thumbnails
+from ..kvstore import KVStore
+from ..models import Post
+from .utils import MediaTestCase, image_file, run_on_commit
+
+User = get_user_model()
+
+
+class ThumbnailPipelineTests(MediaTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self) -> None:
+        super().setUp()
+        shutil.rmtree(os.path.join(self.media_root, 'cache'),
+                      ignore_errors=True)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def thumbnail_files(self):
+        found = []
+        for _, _, files in os.walk(os.path.join(self.media_root, 'cache')):
+            found.extend(files)
+        return found
+
+    @mock.patch('posts.thumbnails.transaction.on_commit', run_on_commit)
+    def test_post_create_generates_thumbnails(self):
+        """Проверить: post_create генерирует миниатюры до показа ленты."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой', 'image': image_file()})
+        self.assertEqual(len(self.thumbnail_files()),
+                         len(settings.THUMBNAIL_GEOMETRIES))
+
+    def test_thumbnails_wait_for_commit(self):
+        """Проверить: миниатюры не генерируются до коммита транзакции."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой', 'image': image_file()})
+        self.assertEqual(self.thumbnail_files(), [])
+
+    def test_responsive_picture(self):
+        """Проверить: картинка поста выводится с WebP, srcset и lazy."""
+        post = Post.objects.create(text='Пост', author=self.user,
+                                   image=image_file('wide.png', (1200, 600)))
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '.webp 320w')
+        self.assertContains(response, '.jpg 960w')
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_backfill_command(self):
+        """Проверить: generate_thumbnails обрабатывает загруженные картинки."""
+        Post.objects.create(text='Пост', author=self.user,
+                            image=image_file('old.png'))
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('1/1', out.getvalue())
+        self.assertEqual(len(self.thumbnail_files()),
+                         len(settings.THUMBNAIL_GEOMETRIES))
+
+
+class KVStoreTests(MediaTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.post = Post.objects.create(text='Пост', author=self.user,
+                                        image=image_file('kv.png'))
+        thumbnails.generate_thumbnails(self.post.image)
+        # Новый экземпляр - как после перезапуска процесса.
+        default.kvstore._wrapped = KVStore()
+
+    def tearDown(self) -> None:
+        default.kvstore._wrapped = KVStore()
+
+    def render_thumbnails(self):
+        for geometry, options in settings.THUMBNAIL_GEOMETRIES:
+            get_thumbnail(self.post.image, geometry, **options)
+
+    def test_entries_survive_restart(self):
+        """Проверить: записи о миниатюрах читаются из БД, а не создаются."""
+        with mock.patch('sorl.thumbnail.base.ThumbnailBackend.'
+                        '_create_thumbnail') as create:
+            self.render_thumbnails()
+        create.assert_not_called()
+
+    def test_prefetch_one_query(self):
+        """Проверить: prefetch загружает записи одним запросом."""
+        with CaptureQueriesContext(connection) as prefetch_queries:
+            thumbnails.prefetch([self.post])
+        self.assertEqual(len(prefetch_queries), 1)
+        with CaptureQueriesContext(connection) as render_queries:
+            self.render_thumbnails()
+        self.assertEqual(len(render_queries), 0)
+
+    def test_prefetch_skips_posts_without_image(self):
+        """Проверить: prefetch без картинок не обращается к БД."""
+        post = Post.objects.create(text='Без картинки', author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            thumbnails.prefetch([post])
+        self.assertEqual(len(queries), 0)
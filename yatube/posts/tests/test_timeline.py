@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import AuthorStats, Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки',
+            author=cls.author,
+        )
+
+    def setUp(self) -> None:
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow_page_ids(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return [post.id for post in response.context['page_obj']]
+
+    def test_follow_backfills_and_new_post_fans_out(self):
+        """Проверить: подписка заполняет ленту, новый пост попадает в неё."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(self.follow_page_ids(),
+                         [new_post.id, self.old_post.id])
+
+    def test_unfollow_evicts_author_posts(self):
+        """Проверить: отписка удаляет посты автора из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.follow_page_ids(), [])
+
+    def test_deleted_post_leaves_timeline(self):
+        """Проверить: удалённый пост пропадает из ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Удаляемый пост', author=self.author)
+        post.delete()
+        self.assertEqual(self.follow_page_ids(), [self.old_post.id])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_heavy_author_is_merged_on_read(self):
+        """Проверить: посты популярного автора подмешиваются при чтении."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.follow_page_ids(),
+                         [new_post.id, self.old_post.id])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, PAGINATOR_REC=2)
+    def test_pages_merge_timeline_and_heavy_author(self):
+        """Проверить: курсор листает ленту вместе с постами популярного."""
+        heavy = User.objects.create_user(username='heavy')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=heavy)
+        Follow.objects.create(
+            user=User.objects.create_user(username='fan'), author=heavy)
+        posts = [self.old_post]
+        for number in range(4):
+            posts.append(Post.objects.create(
+                text=f'Пост {number}',
+                author=heavy if number % 2 else self.author,
+            ))
+        self.assertFalse(TimelineEntry.objects.filter(author=heavy))
+
+        ids = []
+        url = reverse('posts:follow_index')
+        while url:
+            response = self.reader_client.get(url)
+            ids.extend(post.id for post in response.context['page_obj'])
+            cursor = response.context['page_obj'].paginator.next_cursor
+            url = (f'{reverse("posts:follow_index")}?after={cursor}'
+                   if cursor else None)
+        self.assertEqual(ids, [post.id for post in reversed(posts)])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_no_longer_heavy_is_backfilled(self):
+        """Проверить: посты бывшего популярного раскладывает команда."""
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=fan, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        Follow.objects.filter(user=fan).delete()
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        self.assertEqual(self.follow_page_ids(),
+                         [post.id, self.old_post.id])
+
+        call_command('backfill_timelines', stdout=StringIO())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=fan))
+        self.assertFalse(
+            AuthorStats.objects.get(user=self.author).timeline_pending)
+        self.assertEqual(self.follow_page_ids(),
+                         [post.id, self.old_post.id])
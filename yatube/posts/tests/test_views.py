@@ -1,10 +1,18 @@
+import multiprocessing
+import time
+from unittest import mock
+
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Group, Post
+from ..cache import bump_feed_version
+from ..models import Comment, Follow, Group, Post, TimelineEntry
+from ..utils import seek
 
 User = get_user_model()
 
@@ -161,3 +169,251 @@ class PaginatorViewsTest(TestCase):
             + '?page=2'
         ))
         self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_cursor_pages_cover_index_without_overlap(self):
+        """Проверить: курсорные страницы index идут без пропусков и дублей."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        first_page = response.context['page_obj']
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+        next_cursor = first_page.paginator.next_cursor
+        expected_ids = list(Post.objects.values_list('id', flat=True))
+
+        Post.objects.create(text='Новый пост', author=self.user)
+        cache.clear()
+        response = self.authorized_client.get(
+            reverse('posts:index') + f'?after={next_cursor}'
+        )
+        second_page = response.context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+        ids = [post.id for post in first_page] + [
+            post.id for post in second_page
+        ]
+        self.assertCountEqual(ids, expected_ids)
+
+        response = self.authorized_client.get(
+            reverse('posts:index')
+            + f'?before={second_page.paginator.previous_cursor}'
+        )
+        self.assertEqual(
+            [post.id for post in response.context['page_obj']],
+            [post.id for post in first_page]
+        )
+
+    def test_cursor_page_does_not_count_rows(self):
+        """Проверить: курсорная страница group_list обходится без COUNT."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()]
+        )
+
+    def test_cursor_seeks_index(self):
+        """Проверить: курсор начинает поиск по индексу, а не просмотр."""
+        post = Post.objects.all()[5]
+        position = (post.pub_date, post.pk)
+        cases = (
+            (Post.objects.all(), ('pub_date', 'id'), '(pub_date'),
+            (Post.objects.filter(group=self.group), ('pub_date', 'id'),
+             '(group_id=? AND pub_date'),
+            (TimelineEntry.objects.filter(user=self.user),
+             ('pub_date', 'post_id'), '(user_id=? AND pub_date'),
+        )
+        for queryset, fields, expected in cases:
+            for newer in (False, True):
+                with self.subTest(sql=expected, newer=newer):
+                    with CaptureQueriesContext(connection) as queries:
+                        seek(queryset, fields, position, newer, 11)
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f'EXPLAIN QUERY PLAN {queries[0]["sql"]}')
+                        plan = ' '.join(row[-1] for row in cursor)
+                    self.assertIn('SEARCH', plan)
+                    self.assertIn(expected + ('>?' if newer else '<?'),
+                                  plan)
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='ZSV8', first_name='Иван', last_name='Петров')
+        cls.group = Group.objects.create(title='Группа', slug='cards')
+        cls.post_obj = Post.objects.create(
+            text='Карточка поста',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_card_is_shared_between_feeds(self):
+        """Проверить: карточка из кеша index переиспользуется в group_list."""
+        self.client.get(reverse('posts:index'))
+        Post.objects.filter(pk=self.post_obj.pk).update(text='Обход кеша')
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}))
+        self.assertContains(response, 'Карточка поста')
+
+    def test_card_is_rerendered_after_edit(self):
+        """Проверить: изменённый пост рендерится заново."""
+        self.client.get(reverse('posts:index'))
+        self.post_obj.text = 'Изменённый пост'
+        self.post_obj.save()
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}))
+        self.assertContains(response, 'Изменённый пост')
+
+    def test_card_is_rerendered_after_author_rename(self):
+        """Проверить: смена имени автора обновляет карточки его постов."""
+        self.client.get(reverse('posts:index'))
+        self.user.first_name = 'Пётр'
+        self.user.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пётр Петров')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post_obj = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def revalidate(self, url, response, **headers):
+        if 'ETag' in response:
+            headers['HTTP_IF_NONE_MATCH'] = response['ETag']
+        return self.client.get(url, **headers)
+
+    def test_not_modified(self):
+        """Проверить: неизменённая страница отвечает 304."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post_obj.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('ETag', response)
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304)
+
+    def test_new_post_changes_feed(self):
+        """Проверить: новый пост меняет ETag ленты."""
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        response = self.client.get(url)
+        Post.objects.create(text='Новый', author=self.author,
+                            group=self.group)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_viewer_changes_etag(self):
+        """Проверить: ETag зависит от пользователя."""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.client.force_login(self.author)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_follow_changes_profile(self):
+        """Проверить: подписка меняет ETag профиля."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        response = self.client.get(url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_comment_changes_post_detail(self):
+        """Проверить: комментарий меняет ETag и Last-Modified поста."""
+        url = reverse('posts:post_detail', args=(self.post_obj.pk,))
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        Comment.objects.create(post=self.post_obj, author=self.reader,
+                               text='Комментарий')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_author_rename_changes_post_detail(self):
+        """Проверить: смена имени автора меняет валидаторы, но не посты."""
+        url = reverse('posts:post_detail', args=(self.post_obj.pk,))
+        response = self.client.get(url)
+        modified = Post.objects.get(pk=self.post_obj.pk).modified
+        self.author.first_name = 'Иван'
+        # Last-Modified точен до секунды: переименование через минуту.
+        with mock.patch('posts.cache.time.time_ns',
+                        return_value=time.time_ns() + 60 * 10 ** 9):
+            self.author.save()
+        self.assertEqual(
+            Post.objects.get(pk=self.post_obj.pk).modified, modified)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        ).status_code, 200)
+
+    def test_version_shared_between_processes(self):
+        """Проверить: пост, сохранённый другим процессом, меняет ETag."""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        process = multiprocessing.get_context('fork').Process(
+            target=bump_feed_version)
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+
+class AudienceCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.first = User.objects.create_user(username='first_reader')
+        cls.second = User.objects.create_user(username='second_reader')
+        Follow.objects.create(user=cls.first, author=cls.author)
+        Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def get(self, url, user=None):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        return client.get(url)
+
+    def test_shared_page_personal_header(self):
+        """Проверить: вошедшие делят кеш, но видят своё имя."""
+        url = reverse('posts:index')
+        self.get(url, self.first)
+        response = self.get(url, self.second)
+        self.assertTemplateNotUsed(response, 'posts/index.html')
+        self.assertContains(response, 'User: second_reader')
+        self.assertNotContains(response, 'first_reader')
+
+    def test_audiences_cached_separately(self):
+        """Проверить: анонимы не получают страницу вошедших."""
+        url = reverse('posts:index')
+        self.get(url, self.first)
+        response = self.get(url)
+        self.assertTemplateUsed(response, 'posts/index.html')
+        self.assertNotContains(response, 'New record')
+
+    def test_follow_button_per_user(self):
+        """Проверить: кнопка подписки в профиле своя у каждого."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        self.assertContains(self.get(url, self.first), 'Отписаться')
+        response = self.get(url, self.second)
+        self.assertTemplateNotUsed(response, 'posts/profile.html')
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(self.get(url, self.author), 'Подписаться')
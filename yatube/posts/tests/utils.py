@@ -0,0 +1,48 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default
+
+from ..kvstore import KVStore
+
+
+def image_file(name='image.png', size=(60, 40), color=(0, 128, 255)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+def run_on_commit(func):
+    """Замена transaction.on_commit: в TestCase коммита не бывает."""
+    func()
+
+
+class MediaTestCase(TestCase):
+    """TestCase с картинками постов.
+
+    У каждого класса свой временный MEDIA_ROOT, миниатюры строятся
+    в процессе теста. LRU записей миниатюр переживает откат транзакции
+    теста, поэтому перед каждым тестом создаётся заново.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(
+            MEDIA_ROOT=cls.media_root, THUMBNAIL_WORKERS=0)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self) -> None:
+        super().setUp()
+        default.kvstore._wrapped = KVStore()
@@ -0,0 +1,165 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from sorl.thumbnail import default, delete, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import KVStoreBase
+
+from core import metrics
+from core.profiling import timer
+from .storage import content_storage
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+class NullKVStore(KVStoreBase):
+    """KV-хранилище рабочего процесса: ничего не хранит.
+
+    Рабочий процесс только пишет файлы миниатюр; записи о них веб-процесс
+    делает сам при первом обращении, без повторного декодирования.
+    """
+
+    def get(self, image_file):
+        return None
+
+    def set(self, image_file, source=None):
+        pass
+
+    def get_or_set(self, image_file):
+        return image_file
+
+    def _get_raw(self, key):
+        return None
+
+    def _set_raw(self, key, value):
+        pass
+
+    def _delete_raw(self, *keys):
+        pass
+
+    def _find_keys_raw(self, prefix):
+        return []
+
+
+def _setup_worker():
+    import django
+    django.setup()
+    default.kvstore._wrapped = NullKVStore()
+
+
+def generate_thumbnails(name):
+    """Создать все миниатюры из THUMBNAIL_GEOMETRIES для файла name."""
+    # Хранилище поля входит в ключ миниатюры: тот же, что у post.image.
+    source = ImageFile(name, content_storage)
+    for geometry, options in settings.THUMBNAIL_GEOMETRIES:
+        get_thumbnail(source, geometry, **options)
+    metrics.inc('yatube_thumbnails_generated_total',
+                amount=len(settings.THUMBNAIL_GEOMETRIES))
+    return name
+
+
+def thumbnail_name(file_, geometry, options):
+    """Имя файла миниатюры, как его считает get_thumbnail."""
+    backend = default.backend
+    source = ImageFile(file_, content_storage)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def thumbnail_key(file_, geometry, options):
+    """Ключ миниатюры в KV-хранилище, как его считает get_thumbnail."""
+    return ImageFile(thumbnail_name(file_, geometry, options),
+                     default.storage).key
+
+
+def prefetch(posts):
+    """Загрузить записи миниатюр страницы постов одним запросом."""
+    store = default.kvstore
+    if not hasattr(store, 'prefetch'):
+        return
+    with timer('thumbnails'):
+        store.prefetch([
+            thumbnail_key(post.image, geometry, options)
+            for post in posts if post.image
+            for geometry, options in settings.THUMBNAIL_GEOMETRIES
+        ])
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_setup_worker,
+        )
+    return _executor
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error('Ошибка генерации миниатюр: %s', error)
+
+
+def submit(name):
+    if not settings.THUMBNAIL_WORKERS:
+        return generate_thumbnails(name)
+    future = get_executor().submit(generate_thumbnails, name)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def schedule(post):
+    """Поставить миниатюры картинки поста в очередь после коммита."""
+    if not post.image:
+        return
+    name = post.image.name
+    transaction.on_commit(lambda: submit(name))
+
+
+def release(name):
+    """Удалить картинку и её миниатюры, если на неё не ссылаются посты.
+
+    Ссылки перепроверяются после коммита под блокировкой хранилища.
+    Файл, загруженный заново после release, остаётся: пост, который
+    на него ссылается, может быть ещё не закоммичен.
+    """
+    if not name:
+        return
+    released = time.time()
+
+    def collect():
+        # Модуль импортируется рабочими процессами до django.setup().
+        from .models import Post
+        with content_storage.lock(), transaction.atomic():
+            if Post.objects.filter(image=name).exists():
+                return
+            try:
+                if (content_storage.exists(name) and os.path.getmtime(
+                        content_storage.path(name)) >= released):
+                    return
+                delete(ImageFile(name, content_storage))
+            except (OSError, SuspiciousFileOperation) as error:
+                logger.error('Не удалось удалить картинку %s: %s',
+                             name, error)
+
+    transaction.on_commit(collect)
@@ -0,0 +1,170 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .utils import CursorPaginator, seek
+
+
+def heavy(prefix=''):
+    """Условие на AuthorStats: посты автора подмешиваются при чтении.
+
+    Это авторы с большим числом подписчиков и авторы, чьи посты ещё
+    ждут раскладки после того, как подписчиков стало меньше.
+    """
+    return (
+        Q(**{f'{prefix}followers_count__gt': settings.TIMELINE_FANOUT_LIMIT})
+        | Q(**{f'{prefix}timeline_pending': True})
+    )
+
+
+def is_heavy_author(author_id):
+    """Посты автора не раскладываются по лентам при записи."""
+    return AuthorStats.objects.filter(heavy(), user_id=author_id).exists()
+
+
+def fan_out_post(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if post.author_id is None or is_heavy_author(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post=post, author_id=post.author_id,
+                       pub_date=post.pub_date)
+         for user_id in followers.iterator()),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+    )
+
+
+def backfill(follow):
+    """Добавить в ленту подписчика последние посты нового автора."""
+    if is_heavy_author(follow.author_id):
+        return
+    posts = Post.objects.filter(author_id=follow.author_id).values_list(
+        'id', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=follow.user_id, post_id=post_id,
+                       author_id=follow.author_id, pub_date=pub_date)
+         for post_id, pub_date in posts),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_posts(post_ids):
+    """Разложить по лентам пачку постов, например при импорте."""
+    posts = Post.objects.filter(pk__in=post_ids).exclude(
+        heavy('author__stats__'),
+    ).values_list('pk', 'author_id', 'pub_date')
+    posts = list(posts)
+    followers = defaultdict(list)
+    for author_id, user_id in Follow.objects.filter(
+            author_id__in={author_id for _, author_id, _ in posts},
+    ).values_list('author_id', 'user_id').iterator():
+        followers[author_id].append(user_id)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id,
+                       pub_date=pub_date)
+         for post_id, author_id, pub_date in posts
+         for user_id in followers[author_id]),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_followers(author_id):
+    """Разложить последние посты автора по лентам всех подписчиков."""
+    posts = list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list('id', 'pub_date')[
+        :settings.TIMELINE_BACKFILL])
+    followers = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id,
+                       author_id=author_id, pub_date=pub_date)
+         for user_id in followers.iterator()
+         for post_id, pub_date in posts),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def evict(follow):
+    """Убрать из ленты подписчика посты автора, от которого он отписался.
+
+    Если с этой отпиской автор опустился до TIMELINE_FANOUT_LIMIT
+    подписчиков, он только помечается: его посты по-прежнему
+    подмешиваются при чтении, а раскладывает их backfill_pending.
+    """
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id).delete()
+    AuthorStats.objects.filter(
+        user_id=follow.author_id,
+        followers_count=settings.TIMELINE_FANOUT_LIMIT,
+    ).update(timeline_pending=True)
+
+
+def backfill_pending(limit=None):
+    """Разложить посты помеченных авторов; вернуть число авторов.
+
+    Каждый автор обрабатывается в своей транзакции. Автор, снова
+    ставший популярным, только теряет пометку.
+    """
+    pending = AuthorStats.objects.filter(timeline_pending=True).values_list(
+        'user_id', flat=True)[:limit]
+    done = 0
+    for author_id in list(pending):
+        with transaction.atomic():
+            stats = AuthorStats.objects.select_for_update().filter(
+                user_id=author_id, timeline_pending=True).first()
+            if stats is None:
+                continue
+            if stats.followers_count <= settings.TIMELINE_FANOUT_LIMIT:
+                backfill_followers(author_id)
+            stats.timeline_pending = False
+            stats.save(update_fields=['timeline_pending'])
+        done += 1
+    return done
+
+
+def heavy_posts(user):
+    """Посты популярных авторов, на которых подписан пользователь."""
+    return Post.objects.filter(author_id__in=Follow.objects.filter(
+        heavy('author__stats__'), user=user,
+    ).values('author_id'))
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная пагинация ленты подписок.
+
+    Материализованная лента листается по индексу TimelineEntry
+    (user, pub_date, post) без JOIN в условии и сортировке; посты
+    популярных авторов выбираются отдельным запросом по индексу
+    (author, pub_date, id) и сливаются с лентой по паре (pub_date, id).
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.select_related('author', 'group'),
+                         per_page)
+        self.user = user
+
+    def _seek(self, position, newer):
+        limit = self.per_page + 1
+        entries = seek(
+            TimelineEntry.objects.filter(user=self.user).select_related(
+                'post__author', 'post__group'),
+            ('pub_date', 'post_id'), position, newer, limit,
+        )
+        # Записи, разложенные до того, как автор стал популярным,
+        # совпадают с его постами из второго запроса.
+        posts = {entry.post_id: entry.post for entry in entries}
+        for post in seek(heavy_posts(self.user).select_related(
+                'author', 'group'), self.cursor_fields, position, newer,
+                limit):
+            posts.setdefault(post.pk, post)
+        return sorted(posts.values(), key=lambda post: (post.pub_date,
+                                                        post.pk),
+                      reverse=not newer)[:limit]
@@ -0,0 +1,95 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from PIL import Image
+
+
+def too_large():
+    return ValidationError(
+        'Файл больше %(limit)d МБ.',
+        code='file_too_large',
+        params={'limit': settings.IMAGE_UPLOAD_MAX_SIZE // 2 ** 20},
+    )
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Прервать разбор запроса, как только файл превысил лимит.
+
+    Остаток тела запроса не читается. Имена полей прерванных файлов
+    попадают в request.oversized_uploads, чтобы форма сообщила об
+    ошибке, а не сохранила пост без картинки.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if not hasattr(self.request, 'oversized_uploads'):
+            self.request.oversized_uploads = set()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.request.oversized_uploads.add(self.field_name)
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def downsample(upload):
+    """Уменьшить картинку до IMAGE_MAX_SIDE по большей стороне.
+
+    Выполняется один раз при загрузке, поэтому миниатюры потом
+    строятся из картинки ограниченного размера. Меньшие картинки
+    возвращаются без перекодирования.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    side = settings.IMAGE_MAX_SIDE
+    if max(image.size) <= side:
+        upload.seek(0)
+        return upload
+    image_format = image.format
+    name, content_type = upload.name, upload.content_type
+    # JPEG декодируется сразу в уменьшенном масштабе.
+    image.draft(image.mode, (side, side))
+    image.thumbnail((side, side), Image.LANCZOS)
+    Image.init()
+    if image_format not in Image.SAVE:
+        # Pillow читает, но не пишет, например, SUN и MPO.
+        if image.mode in ('RGB', 'L'):
+            image_format, extension = 'JPEG', '.jpg'
+        else:
+            image_format, extension = 'PNG', '.png'
+            if image.mode not in ('RGBA', 'LA', 'P', '1', 'I'):
+                image = image.convert('RGBA')
+        name = os.path.splitext(name)[0] + extension
+        content_type = Image.MIME[image_format]
+    buffer = BytesIO()
+    options = {'quality': 90} if image_format == 'JPEG' else {}
+    image.save(buffer, image_format, **options)
+    resized = SimpleUploadedFile(name, buffer.getvalue(), content_type)
+    resized.image = image
+    return resized
+
+
+def ingest_image(upload):
+    """Проверить загруженную картинку и ограничить её размеры.
+
+    Файл к этому моменту уже записан во временный файл по частям.
+    Размер файла проверяется без чтения, размеры картинки - по
+    заголовку, без полного декодирования.
+    """
+    if upload.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise too_large()
+    width, height = upload.image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка больше %(limit)d мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': settings.IMAGE_MAX_PIXELS // 10 ** 6},
+        )
+    return downsample(upload)
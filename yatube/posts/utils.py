@@ -1,10 +1,176 @@
+import base64
+import binascii
+
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+def seek(queryset, fields, position, newer, limit):
+    """Не больше limit строк по одну сторону от позиции (дата, id).
+
+    newer - строки новее позиции по возрастанию, иначе старше по убыванию.
+    """
+    date_field, pk_field = fields
+    if newer:
+        ordering = (date_field, pk_field)
+        lookup = 'gt'
+    else:
+        ordering = (f'-{date_field}', f'-{pk_field}')
+        lookup = 'lt'
+    queryset = queryset.order_by(*ordering)
+    if position is not None:
+        pub_date, pk = position
+        # Отдельное нестрогое условие по дате - диапазон, с которого
+        # SQLite начинает поиск по индексу, а не просмотр с его начала.
+        queryset = queryset.filter(
+            **{f'{date_field}__{lookup}e': pub_date},
+        ).filter(
+            Q(**{f'{date_field}__{lookup}': pub_date})
+            | Q(**{f'{pk_field}__{lookup}': pk})
+        )
+    return list(queryset[:limit])
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинатор по паре (pub_date, id) без COUNT и OFFSET.
+
+    Страница выбирается по курсору соседней записи: `after` - записи
+    старше курсора, `before` - новее. Выборка берёт per_page + 1 строку,
+    лишняя строка лишь сообщает о наличии следующей страницы.
+    Возвращает обычный `Page`: number и num_pages подменяются так,
+    чтобы has_next/has_previous работали без подсчёта строк.
+    """
+
+    cursor_fields = ('pub_date', 'id')
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.next_cursor = None
+        self.previous_cursor = None
+        # Прочие GET-параметры страницы для ссылок пагинатора.
+        self.query_string = ''
+        self._num_pages = 1
+
+    @cached_property
+    def count(self):
+        # Общее число записей keyset-пагинатору не нужно.
+        return None
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    @property
+    def page_range(self):
+        return range(1, self._num_pages + 1)
+
+    @staticmethod
+    def encode_raw(raw):
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_raw(cursor):
+        """Разобрать курсор на две части "значение|id"."""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        parts = raw.split('|')
+        return parts if len(parts) == 2 else None
+
+    @staticmethod
+    def encode_cursor(obj):
+        return CursorPaginator.encode_raw(
+            f'{obj.pub_date.isoformat()}|{obj.pk}')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        parts = CursorPaginator.decode_raw(cursor)
+        if parts is None:
+            return None
+        try:
+            pub_date = parse_datetime(parts[0])
+            pk = int(parts[1])
+        except ValueError:
+            return None
+        if pub_date is None:
+            return None
+        return pub_date, pk
+
+    def _seek(self, position, newer):
+        return seek(self.object_list, self.cursor_fields, position, newer,
+                    self.per_page + 1)
+
+    def get_page(self, after=None, before=None):
+        """Вернуть страницу по курсору; битый курсор - первая страница."""
+        position = self.decode_cursor(before)
+        rows = self._seek(position, newer=True) if position else []
+        if rows:
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            position = self.decode_cursor(after)
+            rows = self._seek(position, newer=False)
+            has_previous = position is not None
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+
+        if rows and has_next:
+            self.next_cursor = self.encode_cursor(rows[-1])
+        if rows and has_previous:
+            self.previous_cursor = self.encode_cursor(rows[0])
+        number = 2 if self.previous_cursor else 1
+        self._num_pages = number + 1 if self.next_cursor else number
+        return Page(rows, number, self)
+
+
+class ApproximateCountPaginator(Paginator):
+    """Пагинатор админки без COUNT(*) по большим таблицам на каждый запрос.
+
+    Число строк приблизительное. Для нефильтрованного списка это точный
+    COUNT, закешированный на ADMIN_COUNT_TIMEOUT секунд: до пересчёта
+    он отстаёт от таблицы на строки, добавленные или удалённые за это
+    время. Фильтрованный список считает не больше ADMIN_COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            key = f'admin_count:{queryset.db}:{queryset.model._meta.db_table}'
+            return cache.get_or_set(
+                key, lambda: queryset.order_by().count(),
+                settings.ADMIN_COUNT_TIMEOUT)
+        return queryset.order_by()[:settings.ADMIN_COUNT_LIMIT].count()
+
+
+def page_query_string(request):
+    query = request.GET.copy()
+    for key in ('page', 'after', 'before'):
+        query.pop(key, None)
+    return f'{query.urlencode()}&' if query else ''
 
 
 def paginator_func(request, post_list):
-    paginator = Paginator(post_list, settings.PAGINATOR_REC)
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if page_number is not None:
+        # Старые ссылки вида ?page=N продолжают работать через OFFSET.
+        paginator = Paginator(post_list, settings.PAGINATOR_REC)
+        return paginator.get_page(page_number)
 
-    return page_obj
+    paginator = CursorPaginator(post_list, settings.PAGINATOR_REC)
+    paginator.query_string = page_query_string(request)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
@@ -1,20 +1,31 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition, etag
 
+from core.query_budget import query_budget
+from .cache import (feed_etag, feed_version, post_etag, post_last_modified,
+                    profile_etag, versioned_cache_page)
+from .counters import author_stats
 from .forms import CommentForm, PostForm
+from . import thumbnails
 from .models import Comment, Follow, Group, Post
-from .utils import paginator_func
+from .search import SearchPaginator, to_match_query
+from .timeline import TimelinePaginator
+from .utils import page_query_string, paginator_func
 
 User = get_user_model()
 
 
-@cache_page(settings.CACHE_PERIOD)
+@etag(feed_etag)
+@versioned_cache_page(settings.CACHE_PERIOD)
+@query_budget(3)
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.select_related('author', 'group')
     page_obj = paginator_func(request, post_list)
+    thumbnails.prefetch(page_obj)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None
@@ -24,14 +35,19 @@ def index(request):
         'form': form,
         'post_list': post_list,
         'cache_period': settings.CACHE_PERIOD,
+        'feed_version': feed_version(),
     }
     return render(request, 'posts/index.html', context)
 
 
+@etag(feed_etag)
+@versioned_cache_page(settings.CACHE_PERIOD)
+@query_budget(3)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.select_related('author')
     page_obj = paginator_func(request, post_list)
+    thumbnails.prefetch(page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -39,30 +55,32 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@etag(profile_etag)
+@versioned_cache_page(settings.CACHE_PERIOD)
+@query_budget(4)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    records_count = post_list.count()
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    post_list = author.posts.select_related('group')
+    records_count = author_stats(author).posts_count
     page_obj = paginator_func(request, post_list)
-
-    following = False
-    if request.user.username and request.user.username != username:
-        following = Follow.objects.filter(
-            author=author, user=request.user).exists
-
+    thumbnails.prefetch(page_obj)
     context = {
         'page_obj': page_obj,
         'author': author,
         'records_count': records_count,
-        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+@query_budget(5)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_author_count = Post.objects.filter(author=post.author).count()
-    comments = Comment.objects.filter(post=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id)
+    post_author_count = author_stats(post.author).posts_count
+    thumbnails.prefetch([post])
+    comments = Comment.objects.filter(post=post_id).select_related('author')
     form = CommentForm(
         request.POST or None
     )
@@ -75,29 +93,61 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(6)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group = Group.objects.filter(slug=request.GET.get('group')).first()
+    author = User.objects.filter(username=request.GET.get('author')).first()
+    paginator = SearchPaginator(
+        to_match_query(query),
+        settings.PAGINATOR_REC,
+        group_id=group.pk if group else None,
+        author_id=author.pk if author else None,
+    )
+    paginator.query_string = page_query_string(request)
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    thumbnails.prefetch(page_obj)
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'groups': Group.objects.all(),
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None
+        files=request.FILES or None,
+        oversized=getattr(request, 'oversized_uploads', ()),
     )
     if request.method == 'POST':
         if form.is_valid():
             form = form.save(commit=False)
             form.author = request.user
             form.save()
+            thumbnails.schedule(form)
             return redirect('posts:profile', username=request.user.username)
 
     return render(request, 'posts/create_post.html', {'form': form, })
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     post_obj = get_object_or_404(Post, id=post_id)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post_obj
+        instance=post_obj,
+        oversized=getattr(request, 'oversized_uploads', ()),
     )
     is_edit = True
 
@@ -106,7 +156,9 @@ def post_edit(request, post_id):
 
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            post = form.save()
+            if 'image' in form.changed_data:
+                thumbnails.schedule(post)
             return redirect('posts:post_detail', post_id)
 
     return render(
@@ -116,6 +168,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -129,10 +182,15 @@ def add_comment(request, post_id):
 
 
 @login_required
+@query_budget(3)
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-
-    page_obj = paginator_func(request, post_list)
+    paginator = TimelinePaginator(request.user, settings.PAGINATOR_REC)
+    paginator.query_string = page_query_string(request)
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    thumbnails.prefetch(page_obj)
     context = {
         'page_obj': page_obj,
     }
@@ -140,6 +198,7 @@ def follow_index(request):
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     if request.user.username == username:
         return redirect('posts:index')
@@ -154,6 +213,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(author=author, user=request.user).delete()
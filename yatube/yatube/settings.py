@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',  # add record by zsv
     'users.apps.UsersConfig',  # add record by zsv
     'posts.apps.PostsConfig',  # add record by zsv
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -53,6 +55,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,11 +72,25 @@ INTERNAL_IPS = [
     '127.0.0.1',
 ]
 
+# Метрики Prometheus: у каждого процесса свой файл в METRICS_DIR,
+# файлы завершившихся процессов сливаются в merged.db; /metrics
+# суммирует их и отдаётся только адресам METRICS_ALLOWED_IPS
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
+# Запросы дольше порога (мс) пишутся с планом в SLOW_QUERY_LOG;
+# None отключает журнал. Отчёт: manage.py slow_queries
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = os.path.join(tempfile.gettempdir(),
+                              'yatube-slow-queries.ndjson')
+
 ROOT_URLCONF = 'yatube.urls'
 
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.profiling.ProfiledDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -81,6 +100,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.post_card.post_card_cache_period',
             ],
         },
     },
@@ -140,6 +160,11 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+# collectstatic: имена с хешем содержимого и сжатые копии .gz
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStorage'
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -151,9 +176,25 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 # Пагинатор: кол-во записей, выводимых на 1 страницу
 PAGINATOR_REC = 10
-
-# Кеш: период времени в сек. хранения данных в кеше
-CACHE_PERIOD = 20
+# Админка: больше этого числа строк фильтрованный список не считает
+ADMIN_COUNT_LIMIT = 10000
+# Админка: сколько секунд хранится число строк нефильтрованного списка
+ADMIN_COUNT_TIMEOUT = 60
+
+# Лента подписок: авторы с большим числом подписчиков не раскладываются
+# по лентам при записи, их посты подмешиваются при чтении. Посты автора,
+# опустившегося до лимита, раскладывает manage.py backfill_timelines
+TIMELINE_FANOUT_LIMIT = 1000
+# Сколько последних постов автора добавить в ленту при подписке
+TIMELINE_BACKFILL = 200
+TIMELINE_BATCH_SIZE = 500
+
+# Кеш: период времени в сек. хранения данных в кеше.
+# Страницы лент сбрасываются сигналами при изменении постов, групп и
+# авторов; срок ограничивает устаревание при изменениях мимо сигналов
+CACHE_PERIOD = 60 * 5
+# Кеш карточки поста: ключ включает дату изменения поста
+POST_CARD_CACHE_PERIOD = 60 * 60 * 24 * 7
 
 # Имя view-функции, обрабатывающей ошибку 403
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -164,8 +205,68 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки больше этого размера пишутся во временный файл по частям
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+# Ограничения картинок постов; большие картинки уменьшаются при загрузке
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+# Первый обработчик обрывает приём файла больше IMAGE_UPLOAD_MAX_SIZE
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_MAX_PIXELS = 50 * 10 ** 6
+IMAGE_MAX_SIDE = 2048
+
+# Кеш общий для всех процессов: в нём версии лент и авторов, которые
+# сбрасывают сигналы, страницы лент и карточки постов
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.profiling.ProfiledFileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube-cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
+
+# Доля запросов, для которых ProfilingMiddleware собирает замеры
+# и отдаёт заголовок Server-Timing
+PROFILING_SAMPLE_RATE = 0.01
+
+# Строки профиля (JSON) пишутся на INFO в stderr; остальные логгеры
+# остаются с настройками Django по умолчанию
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(name)s %(levelname)s %(message)s'},
+    },
+    'handlers': {
+        'profile': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'plain',
+        },
+    },
+    'loggers': {
+        'core.profiling': {
+            'handlers': ['profile'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Миниатюры, которые генерируются заранее при загрузке картинки и
+# выводятся тегом post_picture: каждая ширина в WebP и в запасном формате
+THUMBNAIL_SIZES = ['320x113', '640x226', '960x339']
+THUMBNAIL_GEOMETRIES = [
+    (size, {'crop': 'center', 'upscale': True, **extra})
+    for extra in ({'format': 'WEBP'}, {})
+    for size in THUMBNAIL_SIZES
+]
+# Число процессов генерации миниатюр; 0 - генерировать в самом запросе
+THUMBNAIL_WORKERS = 2
+# Записи о миниатюрах: таблица sorl-thumbnail в БД и LRU в процессе
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+THUMBNAIL_LRU_SIZE = 10000
+# Выгрузка постов и комментариев читает БД порциями этого размера
+EXPORT_CHUNK_SIZE = 2000
@@ -14,16 +14,23 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.metrics import export as export_metrics
+from core.staticfiles import serve as serve_static
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
+    path('metrics', export_metrics, name='metrics'),
+    re_path(rf'^{settings.STATIC_URL.lstrip("/")}(?P<path>.*)$',
+            serve_static),
 ]
 
 handler404 = 'core.views.page_not_found'